@@ -0,0 +1,61 @@
+"""
+Benchmarks for the DoubleKeyTable.
+
+Run with `python -m benchmarks.bench_double_key_table [entries ...]`,
+by default for 10^5 and 10^6 entries.
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+import tracemalloc
+
+from double_key_table import DoubleKeyTable
+
+
+def sparse_pairs(n: int, seed: int = 0) -> list[tuple[str, str]]:
+    """
+    Generate n distinct (key1, key2) pairs in buckets of one to three
+    entries, as with mountains spread over many difficulty levels.
+    """
+    rng = random.Random(seed)
+    res = []
+    bucket = 0
+    while len(res) < n:
+        for i in range(min(rng.randint(1, 3), n - len(res))):
+            res.append((f"range-{bucket}", f"peak-{bucket}-{i}"))
+        bucket += 1
+    return res
+
+
+def build(pairs: list[tuple[str, str]], small_bucket_size: int) -> tuple[float, float]:
+    """
+    Build a table of the pairs. Returns the MB it holds and the seconds taken.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    table = DoubleKeyTable(small_bucket_size=small_bucket_size)
+    for key in pairs:
+        table[key] = 1
+    seconds = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del table
+    return size / 2 ** 20, seconds
+
+
+def bench_small_buckets(sizes: list[int]) -> None:
+    print("Sparse buckets of 1-3 entries, full internal tables vs SmallTables")
+    print(f"{'entries':>9} {'buckets':>8} {'tables MB':>10} {'small MB':>9} {'saving':>7} {'tables s':>9} {'small s':>8}")
+    for n in sizes:
+        pairs = sparse_pairs(n)
+        buckets = len({key1 for key1, _ in pairs})
+        tables_mb, tables_s = build(pairs, 0)
+        small_mb, small_s = build(pairs, 8)
+        print(f"{n:>9} {buckets:>8} {tables_mb:>10.1f} {small_mb:>9.1f} "
+              f"{1 - small_mb / tables_mb:>7.0%} {tables_s:>9.2f} {small_s:>8.2f}")
+
+
+if __name__ == "__main__":
+    bench_small_buckets([int(arg) for arg in sys.argv[1:]] or [10 ** 5, 10 ** 6])
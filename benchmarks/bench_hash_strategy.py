@@ -0,0 +1,60 @@
+"""
+Benchmarks for the hash strategies.
+
+Run with `python -m benchmarks.bench_hash_strategy [keys ...]`,
+by default for 10^4 and 10^5 keys.
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from data_structures.hash_strategy import BuiltinHash, FNV1aHash, HashStrategy, PolynomialHash
+from data_structures.hash_table import LinearProbeTable
+
+
+def mountain_names(n: int) -> list[str]:
+    """
+    Generate n distinct names shaped like those in the mountain data.
+    """
+    return [f"mount-{i // 7}-{'nesw'[i % 4]}{i % 7}" for i in range(n)]
+
+
+def mean_probe(lengths: list[int]) -> float:
+    return sum(length * count for length, count in enumerate(lengths)) / max(sum(lengths), 1)
+
+
+def bench(keys: list[str], strategy: HashStrategy) -> tuple[float, int, float, float]:
+    """
+    Build a table of the keys then look each up. Returns the mean probe
+    length of the lookups, the longest cluster, and the inserts and lookups
+    per second.
+    """
+    table = LinearProbeTable(hash_strategy=strategy)
+    start = time.perf_counter()
+    for i, key in enumerate(keys):
+        table[key] = i
+    insert_s = time.perf_counter() - start
+    table.enable_stats()
+    start = time.perf_counter()
+    for key in keys:
+        table[key]
+    lookup_s = time.perf_counter() - start
+    stats = table.stats()
+    return (mean_probe(stats["hits"]), stats["max_cluster"],
+            len(keys) / insert_s, len(keys) / lookup_s)
+
+
+def bench_strategies(sizes: list[int]) -> None:
+    print("Mountain names in a LinearProbeTable, by hash strategy")
+    print(f"{'keys':>7} {'strategy':>14} {'mean probe':>11} {'max cluster':>12} {'inserts/s':>10} {'lookups/s':>10}")
+    for n in sizes:
+        keys = mountain_names(n)
+        for strategy in (PolynomialHash(), BuiltinHash(), FNV1aHash()):
+            probe, cluster, inserts, lookups = bench(keys, strategy)
+            print(f"{n:>7} {type(strategy).__name__:>14} {probe:>11.2f} {cluster:>12} "
+                  f"{inserts:>10.0f} {lookups:>10.0f}")
+
+
+if __name__ == "__main__":
+    bench_strategies([int(arg) for arg in sys.argv[1:]] or [10 ** 4, 10 ** 5])
@@ -0,0 +1,120 @@
+"""
+Benchmarks for the LinearProbeTable.
+
+Run with `python -m benchmarks.bench_hash_table`.
+"""
+from __future__ import annotations
+
+import random
+import time
+
+from data_structures.hash_table import LinearProbeTable
+from data_structures.robin_hood_table import RobinHoodTable
+
+
+def mountain_names(n: int, seed: int = 0) -> list[str]:
+    """
+    Generate n distinct, fairly long mountain-style names.
+    """
+    rng = random.Random(seed)
+    prefixes = ["mount", "mt", "pic", "cerro", "monte", "gunung", "ben"]
+    return [
+        f"{rng.choice(prefixes)}-{rng.getrandbits(32):08x}-ridge-{i}"
+        for i in range(n)
+    ]
+
+
+def churn(table: LinearProbeTable, size: int, operations: int, seed: int = 0) -> float:
+    """
+    Fill the table with `size` keys, then repeatedly delete a random live key
+    and insert a fresh one. Returns the seconds spent on the churn phase.
+    """
+    rng = random.Random(seed)
+    live = mountain_names(size, seed)
+    fresh = iter(mountain_names(operations, seed + 1))
+    for name in live:
+        table[name] = name
+
+    start = time.perf_counter()
+    for _ in range(operations):
+        index = rng.randrange(len(live))
+        del table[live[index]]
+        live[index] = next(fresh) + "-new"
+        table[live[index]] = live[index]
+    return time.perf_counter() - start
+
+
+def bench_deletion(sizes=(1_000, 10_000, 50_000), loads=(None, 0.45, 0.7), operations: int = 20_000) -> None:
+    """
+    Compare cluster-reinsert and tombstone deletes.
+
+    A load of None lets the table grow as usual, otherwise the table is
+    pinned to a single size giving roughly that load factor.
+    """
+    print("Churn workload: delete a random key, insert a new one")
+    print(f"{'entries':>10} {'load':>6} {'reinsert (s)':>14} {'tombstone (s)':>14} {'speedup':>8}")
+    for size in sizes:
+        for load in loads:
+            table_sizes = None if load is None else [int(size / load)]
+            reinsert = churn(LinearProbeTable(table_sizes), size, operations)
+            tombstone = churn(LinearProbeTable(table_sizes, tombstones=True), size, operations)
+            label = "grow" if load is None else f"{load:.2f}"
+            print(f"{size:>10} {label:>6} {reinsert:>14.3f} {tombstone:>14.3f} {reinsert / tombstone:>7.2f}x")
+
+
+def lookups(table: LinearProbeTable, keys: list[str], missing: list[str]) -> tuple[float, float]:
+    """
+    Time looking up every key, then every missing key.
+    Returns the seconds spent on (hits, misses).
+    """
+    start = time.perf_counter()
+    for key in keys:
+        table[key]
+    hits = time.perf_counter() - start
+    start = time.perf_counter()
+    for key in missing:
+        key in table
+    return hits, time.perf_counter() - start
+
+
+def bench_robin_hood(sizes=(1_000, 10_000, 100_000)) -> None:
+    """
+    Compare table size and lookup time of LinearProbeTable at its 0.5 load
+    factor against RobinHoodTable at its much higher one.
+    """
+    print("Lookups: LinearProbeTable vs RobinHoodTable")
+    print(f"{'entries':>10} {'table':>16} {'slots':>9} {'hits (s)':>10} {'misses (s)':>11}")
+    for size in sizes:
+        keys = mountain_names(size)
+        missing = [key + "-missing" for key in keys]
+        for table in (LinearProbeTable(), RobinHoodTable()):
+            for key in keys:
+                table[key] = key
+            hits, misses = lookups(table, keys, missing)
+            print(f"{size:>10} {type(table).__name__:>16} {table.table_size:>9} {hits:>10.3f} {misses:>11.3f}")
+
+
+def bench_bulk_load(sizes=(10_000, 100_000, 500_000)) -> None:
+    """
+    Compare filling a table one key at a time against from_items, which
+    sizes the table once and hashes all keys as a batch.
+    """
+    print("Loading: __setitem__ loop vs from_items")
+    print(f"{'entries':>10} {'setitem (s)':>12} {'from_items (s)':>15} {'speedup':>8}")
+    for size in sizes:
+        pairs = [(name, i) for i, name in enumerate(mountain_names(size))]
+        start = time.perf_counter()
+        table = LinearProbeTable()
+        for key, value in pairs:
+            table[key] = value
+        one_by_one = time.perf_counter() - start
+        start = time.perf_counter()
+        LinearProbeTable.from_items(pairs)
+        bulk = time.perf_counter() - start
+        print(f"{size:>10} {one_by_one:>12.3f} {bulk:>15.3f} {one_by_one / bulk:>7.2f}x")
+
+
+if __name__ == "__main__":
+    bench_deletion()
+    bench_robin_hood()
+    bench_bulk_load()
@@ -0,0 +1,68 @@
+"""
+Memory benchmark for the InfiniteHashTable levels.
+
+Run with `python -m benchmarks.bench_infinite_hash_table [keys ...]`,
+by default for 10^6 keys.
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from benchmarks.bench_hash_strategy import mountain_names
+from infinite_hash_table import InfiniteHashTable
+from radix_infinite_hash_table import RadixInfiniteHashTable
+
+
+# Lookups are timed this many times, keeping the fastest.
+LOOKUP_PASSES = 3
+
+
+def count_tables(table: InfiniteHashTable) -> int:
+    res = 0
+    tables = [table]
+    while tables:
+        table = tables.pop()
+        res += 1
+        tables.extend(entry[1] for entry in table.array
+                      if entry is not None and isinstance(entry[1], InfiniteHashTable))
+    return res
+
+
+def bench(keys: list[str], table: InfiniteHashTable) -> tuple[int, int, float, float]:
+    """
+    Build the table from the keys then look each up. Returns the number of
+    tables, the bytes used by the tables themselves (leaving out the keys
+    and values), and the inserts and best lookups per second.
+    """
+    start = time.perf_counter()
+    for i, key in enumerate(keys):
+        table[key] = i
+    insert_s = time.perf_counter() - start
+    # Best of a few passes, as timeit does, to ride out noise.
+    lookup_s = float("inf")
+    for _ in range(LOOKUP_PASSES):
+        start = time.perf_counter()
+        for key in keys:
+            table[key]
+        lookup_s = min(lookup_s, time.perf_counter() - start)
+    footprint = table.memory_footprint()
+    storage = footprint["total"] - footprint["keys"] - footprint["values"]
+    return count_tables(table), storage, len(keys) / insert_s, len(keys) / lookup_s
+
+
+def bench_tables(sizes: list[int]) -> None:
+    print("Mountain names in an InfiniteHashTable, dense against sparse levels")
+    print(f"{'keys':>8} {'table':>24} {'levels':>7} {'tables':>8} {'MiB':>8} {'B/key':>6} "
+          f"{'inserts/s':>10} {'lookups/s':>10}")
+    for n in sizes:
+        keys = mountain_names(n)
+        for cls in (InfiniteHashTable, RadixInfiniteHashTable):
+            for sparse in (False, True):
+                tables, storage, inserts, lookups = bench(keys, cls(sparse_levels=sparse))
+                print(f"{n:>8} {cls.__name__:>24} {'sparse' if sparse else 'dense':>7} {tables:>8} "
+                      f"{storage / 2 ** 20:>8.1f} {storage / n:>6.0f} {inserts:>10.0f} {lookups:>10.0f}")
+
+
+if __name__ == "__main__":
+    bench_tables([int(arg) for arg in sys.argv[1:]] or [10 ** 6])
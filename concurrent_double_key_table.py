@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from threading import Lock, RLock
+from typing import Iterable, Iterator, TypeVar
+
+from data_structures.hash_table import LinearProbeTable
+from double_key_table import DoubleKeyTable
+
+K1 = TypeVar('K1')
+K2 = TypeVar('K2')
+V = TypeVar('V')
+
+
+class ConcurrentDoubleKeyTable(DoubleKeyTable[K1, K2, V]):
+    """
+    Thread-safe Double Hash Table.
+
+    Each key1 belongs to one of `stripes` locks, chosen by Python's hash of
+    key1 so that it never changes when the table is resized. Reading or
+    writing pairs under a key1 already in the table only takes its stripe,
+    as only its internal table changes, so threads working on different
+    key1s rarely contend.
+
+    Anything which changes the layout of the outer table takes every stripe
+    in order, acting as a global lock: adding a new key1 (and any _rehash
+    that follows), deleting the last pair under a key1, and the batch and
+    whole-table operations. Outer probes under a single stripe can then
+    never see a cluster half way through being moved.
+
+    Updates to the secondary index and to the version counter the
+    iterators check, which are shared between key1s, also take a separate
+    lock, held only for that update. The iterators are not locked: use
+    `locked()` to keep writers out while iterating. Probe statistics are
+    approximate when several threads record them at once.
+    """
+
+    # Number of stripe locks.
+    STRIPES = 16
+
+    def __init__(self, sizes:list|None=None, internal_sizes:list|None=None, stripes:int|None=None, **kwargs) -> None:
+        """
+        Initialise the table. Other keyword arguments are as for DoubleKeyTable.
+        """
+        if stripes is not None:
+            self.STRIPES = stripes
+        self.locks = [RLock() for _ in range(self.STRIPES)]
+        self.index_lock = Lock()
+        super().__init__(sizes, internal_sizes, **kwargs)
+
+    def _stripe(self, key1: K1) -> RLock:
+        return self.locks[hash(key1) % len(self.locks)]
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """
+        Hold every stripe, keeping all other threads out of the table.
+        Stripes are always taken in the same order, so two threads doing
+        this cannot deadlock. Must not be called while holding a single
+        stripe.
+
+        :complexity: O(S) where S is the number of stripes.
+        """
+        for lock in self.locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self.locks):
+                lock.release()
+
+    def __getitem__(self, key: tuple[K1, K2]) -> V:
+        """
+        :raises KeyError: when the key doesn't exist.
+        """
+        with self._stripe(key[0]):
+            return super().__getitem__(key)
+
+    def __setitem__(self, key: tuple[K1, K2], data: V) -> None:
+        """
+        Set a pair, under its stripe if key1 is already in the table and
+        under every stripe otherwise.
+        """
+        with self._stripe(key[0]):
+            try:
+                position = self._outer_probe(key[0], False)
+            except KeyError:
+                position = None
+            if position is not None:
+                self._set_at(position, key[0], key[1], data)
+                return
+        # Adds key1, and may rehash. Another thread may have added it since,
+        # in which case this finds it again.
+        with self.locked():
+            super().__setitem__(key, data)
+
+    def __delitem__(self, key: tuple[K1, K2]) -> None:
+        """
+        Delete a pair, under its stripe unless it is the last under key1.
+
+        :raises KeyError: when the key doesn't exist.
+        """
+        with self._stripe(key[0]):
+            position = self._outer_probe(key[0], False)
+            if len(self.array[position][1]) > 1:
+                self._delete_at(position, key[0], key[1])
+                return
+        # May clear the outer slot and move its cluster.
+        with self.locked():
+            super().__delitem__(key)
+
+    def _bump_version(self) -> None:
+        with self.index_lock:
+            super()._bump_version()
+
+    def _index_set(self, key1: K1, key2: K2, table: LinearProbeTable[K2, V]) -> None:
+        with self.index_lock:
+            super()._index_set(key1, key2, table)
+
+    def _index_delete(self, key1: K1, key2: K2) -> None:
+        with self.index_lock:
+            super()._index_delete(key1, key2)
+
+    def get_many(self, keys: Iterable[tuple[K1, K2]]) -> list[V]:
+        with self.locked():
+            return super().get_many(keys)
+
+    def set_many(self, items: Iterable[tuple[tuple[K1, K2], V]]) -> None:
+        with self.locked():
+            super().set_many(items)
+
+    def delete_many(self, keys: Iterable[tuple[K1, K2]]) -> None:
+        with self.locked():
+            super().delete_many(keys)
+
+    def lookup_by_second(self, key2: K2) -> list[tuple[K1, V]]:
+        with self.locked():
+            return super().lookup_by_second(key2)
+
+    def delete_by_second(self, key2: K2) -> None:
+        with self.locked():
+            super().delete_by_second(key2)
+
+    def keys(self, key:K1|None=None) -> list[K1|K2]:
+        with self.locked():
+            return super().keys(key)
+
+    def values(self, key:K1|None=None) -> list[V]:
+        with self.locked():
+            return super().values(key)
+
+    def enable_stats(self) -> None:
+        with self.locked():
+            super().enable_stats()
+
+    def disable_stats(self) -> None:
+        with self.locked():
+            super().disable_stats()
+
+    def stats(self) -> dict:
+        with self.locked():
+            return super().stats()
+
+    def __str__(self) -> str:
+        with self.locked():
+            return super().__str__()
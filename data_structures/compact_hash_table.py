@@ -0,0 +1,268 @@
+""" Compact Hash Table
+
+Defines a Linear Probe Table in the style of CPython's dict: a sparse
+array of indices into a dense, insertion-ordered array of entries.
+"""
+from __future__ import annotations
+
+from typing import TypeVar, Iterator
+
+from data_structures.hash_table import LinearProbeTable, FullError, _TOMBSTONE
+from data_structures.parallel_hash_table import SlotView
+from data_structures.referential_array import ArrayR, ArrayN
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+# Index of a slot freed by a tombstone delete.
+DUMMY = -1
+# Index of an empty slot.
+EMPTY = -2
+
+
+class CompactLinearProbeTable(LinearProbeTable[K, V]):
+    """
+    Compact Linear Probe Table.
+
+    Slots live in `indices` and hold the position of their entry in
+    `entries`, where (key, value, hash) tuples are appended in insertion
+    order. Probing, resizing and deletion work on the indices just as
+    LinearProbeTable works on its slots, and `_linear_probe` gives positions
+    in the indices. Rebuilds reinsert in insertion order rather than slot
+    order, so after one the positions can differ from LinearProbeTable's.
+
+    Deleting an entry leaves a hole in `entries`, which is closed up the
+    next time the table is rebuilt. Iterating only walks the entries, so
+    keys(), values() and __str__ are O(N) in the number of entries rather
+    than the table size, and always follow insertion order.
+
+    Unless stated otherwise, all methods have O(1) complexity.
+    """
+
+    def _allocate(self, table_size: int) -> None:
+        """
+        Replace the slot storage with empty storage of the given size.
+        There is only room for as many entries as the table can hold before
+        it grows, unless it cannot grow any more.
+
+        :complexity: O(table_size)
+        """
+        if self.size_index >= len(self.TABLE_SIZES) - 1:
+            capacity = table_size
+        else:
+            capacity = min(table_size, int(table_size * self.MAX_LOAD_FACTOR) + 1)
+        self.indices = ArrayN(table_size, 'i', EMPTY)
+        self.entries:ArrayR[tuple[K, V, int]] = ArrayR(capacity)
+        self.used = 0
+
+    @property
+    def table_size(self) -> int:
+        return len(self.indices)
+
+    @property
+    def array(self) -> SlotView:
+        """
+        Read-only view of the slots as (key, value, hash) tuples, laid out
+        as they would be in LinearProbeTable. For inspection only.
+        """
+        return SlotView(self)
+
+    def _slot(self, position: int) -> tuple[K, V, int]|None:
+        """
+        The slot at position as it would be stored by LinearProbeTable.
+        """
+        index = self.indices[position]
+        if index == EMPTY:
+            return None
+        elif index == DUMMY:
+            return _TOMBSTONE
+        return self.entries[index]
+
+    def _probe(self, key: K, full_hash: int, is_insert: bool) -> int:
+        """
+        Linear probe through the indices for a key whose full hash has
+        already been computed.
+
+        :complexity: See LinearProbeTable._probe.
+        :raises KeyError: When the key is not in the table, but is_insert is False.
+        :raises FullError: When a table is full and cannot be inserted.
+        """
+        indices = self.indices
+        entries = self.entries
+        table_size = self.table_size
+        position = self._home(key, full_hash)
+        reusable = None
+
+        for probes in range(1, table_size + 1):
+            index = indices[position]
+            if index == EMPTY:
+                if self.probe_stats is not None:
+                    self.probe_stats.record_probe(False, probes)
+                if is_insert:
+                    return position if reusable is None else reusable
+                else:
+                    raise KeyError(key)
+            elif index == DUMMY:
+                if reusable is None:
+                    reusable = position
+            else:
+                entry = entries[index]
+                if entry[2] == full_hash and entry[0] == key:
+                    if self.probe_stats is not None:
+                        self.probe_stats.record_probe(True, probes)
+                    return position
+            position = (position + 1) % table_size
+
+        if self.probe_stats is not None:
+            self.probe_stats.record_probe(False, table_size)
+        if is_insert and reusable is not None:
+            return reusable
+        elif is_insert:
+            raise FullError("Table is full!")
+        else:
+            raise KeyError(key)
+
+    def keys(self) -> list[K]:
+        """
+        Returns all keys in the hash table, in insertion order.
+
+        :complexity: O(N) where N is the number of entries ever appended
+            since the last rebuild, at most the table size.
+        """
+        res = []
+        for x in range(self.used):
+            if self.entries[x] is not None:
+                res.append(self.entries[x][0])
+        return res
+
+    def iter_items(self) -> Iterator[tuple[K, V]]:
+        """
+        See LinearProbeTable.iter_items. Pairs come in insertion order.
+
+        :complexity: See keys.
+        """
+        for x in range(self.used):
+            entry = self.entries[x]
+            if entry is not None:
+                yield entry[0], entry[1]
+
+    def _entries(self) -> Iterator[tuple[K, V, int]]:
+        for x in range(self.used):
+            if self.entries[x] is not None:
+                yield self.entries[x]
+
+    def values(self) -> list[V]:
+        """
+        Returns all values in the hash table, in insertion order.
+
+        :complexity: See keys.
+        """
+        res = []
+        for x in range(self.used):
+            if self.entries[x] is not None:
+                res.append(self.entries[x][1])
+        return res
+
+    def __getitem__(self, key: K) -> V:
+        """
+        Get the value at a certain key
+
+        :complexity: See linear probe.
+        :raises KeyError: when the key doesn't exist.
+        """
+        return self.entries[self.indices[self._linear_probe(key, False)]][1]
+
+    def _value_at(self, position: int) -> V:
+        return self.entries[self.indices[position]][1]
+
+    def _insert(self, key: K, data: V, full_hash: int) -> None:
+        """
+        Insert or update a key whose full hash is known, without resizing.
+        An update keeps the entry's place in the insertion order.
+        If there is no room left for a new entry the holes left by deletes
+        are closed up first.
+
+        :complexity: See linear probe, plus the occasional rebuild.
+        :raises FullError: when the table is full.
+        """
+        position = self._probe(key, full_hash, True)
+        index = self.indices[position]
+        if index >= 0:
+            self.entries[index] = (key, data, full_hash)
+            return
+
+        if self.used == len(self.entries):
+            self._compact()
+            position = self._probe(key, full_hash, True)
+        elif index == DUMMY:
+            self.tombstone_count -= 1
+        self.entries[self.used] = (key, data, full_hash)
+        self.indices[position] = self.used
+        self.used += 1
+        self.count += 1
+
+    def _remove(self, position: int) -> None:
+        """
+        Remove the entry at position, leaving a hole in the entries and
+        either a tombstone or a repaired cluster in the indices.
+
+        :complexity: See LinearProbeTable.__delitem__, without any rehashing.
+        """
+        self.entries[self.indices[position]] = None
+        self.count -= 1
+        if self.tombstones:
+            self.indices[position] = DUMMY
+            self.tombstone_count += 1
+            return
+        self.indices[position] = EMPTY
+        # Start moving over the cluster
+        position = (position + 1) % self.table_size
+        while self.indices[position] != EMPTY:
+            index = self.indices[position]
+            self.indices[position] = EMPTY
+            # Reinsert, reusing the cached hash.
+            entry = self.entries[index]
+            self.indices[self._probe(entry[0], entry[2], True)] = index
+            position = (position + 1) % self.table_size
+
+    def _rebuild(self, table_size: int) -> None:
+        """
+        Rebuild the indices at the given size, closing up any holes in the
+        entries and dropping any tombstones.
+
+        :complexity: See LinearProbeTable._rehash.
+        """
+        old_entries, old_used = self.entries, self.used
+        holes = old_used != self.count
+        self._allocate(table_size)
+        self.tombstone_count = 0
+        if not holes:
+            # Nothing to close up, so the entries keep their indices.
+            self.entries.copy_from(old_entries, old_used)
+        use_cached = self._hash_is_default()
+        indices = self.indices
+        for x in range(old_used):
+            entry = old_entries[x]
+            if entry is not None:
+                if use_cached:
+                    position = entry[2] % table_size
+                else:
+                    position = self.hash(entry[0])
+                while indices[position] != EMPTY:
+                    position = (position + 1) % table_size
+                indices[position] = self.used
+                if holes:
+                    self.entries[self.used] = entry
+                self.used += 1
+
+    def __str__(self) -> str:
+        """
+        Returns all the key/value pairs in our hash table, in insertion order.
+        :complexity: O(N * (str(key) + str(value))) where N is as in keys.
+        """
+        result = ""
+        for x in range(self.used):
+            entry = self.entries[x]
+            if entry is not None:
+                result += "(" + str(entry[0]) + "," + str(entry[1]) + ")\n"
+        return result
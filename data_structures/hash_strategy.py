@@ -0,0 +1,101 @@
+""" Hash Strategies
+
+Interchangeable hash functions for the hash tables. A strategy maps a key
+to a full hash independent of any table size, which the tables cache and
+reduce modulo their size. One strategy object is shared by every table
+using it, so choosing one costs nothing per table.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Hashable, Iterable
+
+from data_structures.string_hash import polynomial_hash, hash_many
+
+# Full hashes are kept below this, so they fit a signed 64 bit integer
+# and never collide with the negative markers the tables use.
+FULL_HASH_LIMIT = 2 ** 63
+
+
+class HashStrategy(ABC):
+    """
+    A hash function for table keys.
+    """
+
+    @abstractmethod
+    def full_hash(self, key: Hashable) -> int:
+        """
+        Hash a key into the range [0, FULL_HASH_LIMIT), independently of
+        the size of the table.
+        """
+        pass
+
+    def hash_many(self, keys: Iterable[Hashable]) -> list[int]:
+        """
+        full_hash of every key.
+
+        :complexity: O(N) calls to full_hash, unless overridden.
+        """
+        full_hash = self.full_hash
+        return [full_hash(key) for key in keys]
+
+
+class PolynomialHash(HashStrategy):
+    """
+    The 31415/base polynomial string hash, with a large prime modulus.
+    Keys must be strings. Batches are hashed with NumPy when available.
+    """
+
+    def __init__(self, base: int = 31, modulus: int = 2147483647) -> None:
+        self.base = base
+        self.modulus = modulus
+
+    def full_hash(self, key: str) -> int:
+        """
+        :complexity: O(len(key))
+        """
+        return polynomial_hash(key, self.modulus, self.base)
+
+    def hash_many(self, keys: Iterable[str]) -> list[int]:
+        """
+        :complexity: See string_hash.hash_many.
+        """
+        return hash_many(keys, self.modulus, self.base)
+
+
+class BuiltinHash(HashStrategy):
+    """
+    Python's own hash, for any hashable key. Much the fastest, as it is
+    computed in C and cached on strings, but string hashes are randomised
+    per process, so the layout of a table differs from run to run.
+    Integers hash to themselves, so an integer key k lands in slot
+    k % table_size.
+    """
+
+    def full_hash(self, key: Hashable) -> int:
+        """
+        :complexity: O(len(key)) the first time a string is hashed, O(1) after.
+        """
+        return hash(key) & (FULL_HASH_LIMIT - 1)
+
+
+class FNV1aHash(HashStrategy):
+    """
+    64 bit FNV-1a over the UTF-8 bytes of a string key, with the top bit
+    dropped. Stable between runs, with better mixing of short keys than
+    the polynomial hash.
+    """
+
+    OFFSET_BASIS = 0xcbf29ce484222325
+    PRIME = 0x100000001b3
+    MASK = 2 ** 64 - 1
+
+    def full_hash(self, key: str) -> int:
+        """
+        :complexity: O(len(key))
+        """
+        value = self.OFFSET_BASIS
+        prime, mask = self.PRIME, self.MASK
+        for byte in key.encode("utf-8"):
+            value = ((value ^ byte) * prime) & mask
+        return value & (FULL_HASH_LIMIT - 1)
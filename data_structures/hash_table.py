@@ -7,8 +7,13 @@ __author__ = 'Jackson Goerner'
 __since__ = '07/02/2023'
 
 
-from typing import TypeVar, Generic
-from data_structures.referential_array import ArrayR
+import json
+from time import perf_counter
+from typing import TypeVar, Generic, Iterable, Iterator
+from data_structures.hash_strategy import HashStrategy, PolynomialHash
+from data_structures.memory_footprint import new_footprint, total, shallow_size, array_size, deep_size
+from data_structures.probe_stats import ProbeStats, max_cluster
+from data_structures.referential_array import ArrayR, ArrayN
 
 K = TypeVar('K')
 V = TypeVar('V')
@@ -17,6 +22,16 @@ class FullError(Exception):
     pass
 
 
+# Left behind by a tombstone delete. Its cached hash never matches a real
+# full hash, so lookups walk straight past it without comparing keys.
+_TOMBSTONE = (object(), None, -1)
+
+# Cached for keys HASH_STRATEGY cannot hash, which only an overridden `hash`
+# can place. Keys are compared whenever cached hashes match, so sharing a
+# value with real full hashes costs no more than an extra comparison.
+_NO_FULL_HASH = 0
+
+
 class LinearProbeTable(Generic[K, V]):
     """
     Linear Probe Table.
@@ -26,6 +41,25 @@ class LinearProbeTable(Generic[K, V]):
                 Otherwise `hash` should be overwritten.
         - V:    Value Type.
 
+    Deletion either repairs the rest of the cluster (the default), or with
+    `tombstones=True` leaves a tombstone behind which later inserts reuse.
+    Once tombstones take up more than `tombstone_limit` of the slots the
+    table is compacted in place.
+
+    The table grows once its load factor passes MAX_LOAD_FACTOR. Given a
+    `min_load_factor` it also shrinks when deletes take the load factor
+    under it, down to a size at most half of MAX_LOAD_FACTOR full.
+    Keeping that gap between the two thresholds stops it from resizing back
+    and forth on every insert and delete.
+
+    Keys are hashed by a HashStrategy, shared by every table of a type
+    unless one is passed to the constructor. The default is the polynomial
+    string hash.
+
+    Calling `enable_stats` makes the table record probe lengths and
+    rehashes, reported by `stats`. This is off by default, costing only a
+    check for None on each probe and rebuild.
+
     Unless stated otherwise, all methods have O(1) complexity.
     """
 
@@ -34,15 +68,92 @@ class LinearProbeTable(Generic[K, V]):
 
     HASH_BASE = 31
 
-    def __init__(self, sizes=None) -> None:
+    # The table grows once more than this share of slots is used.
+    MAX_LOAD_FACTOR = 0.5
+
+    # Modulus of the table-independent hash cached in every slot.
+    # Must be larger than any table size so reducing it loses nothing.
+    FULL_HASH_MODULUS = 2147483647
+
+    # Gives the full hash of every key. Shared between tables, so setting
+    # HASH_BASE in a subclass needs a new strategy here too.
+    HASH_STRATEGY: HashStrategy = PolynomialHash(HASH_BASE, FULL_HASH_MODULUS)
+
+    # Share of slots tombstones may occupy before the table is compacted.
+    # Kept below 0.5 so that, with the load factor, a probe always ends.
+    TOMBSTONE_LIMIT = 0.25
+
+    # The table shrinks once its load factor drops below this. None never shrinks.
+    # Should be well under MAX_LOAD_FACTOR / 4, such as 0.1 for the default 0.5.
+    MIN_LOAD_FACTOR = None
+
+    def __init__(self, sizes=None, tombstones: bool = False, tombstone_limit: float|None = None,
+                 min_load_factor: float|None = None, hash_strategy: HashStrategy|None = None) -> None:
         """
         Initialise the Hash Table.
         """
         if sizes is not None:
             self.TABLE_SIZES = sizes
+        if hash_strategy is not None:
+            self.HASH_STRATEGY = hash_strategy
+        if tombstone_limit is not None:
+            self.TOMBSTONE_LIMIT = tombstone_limit
+        if min_load_factor is not None:
+            self.MIN_LOAD_FACTOR = min_load_factor
         self.size_index = 0
-        self.array:ArrayR[tuple[K, V]] = ArrayR(self.TABLE_SIZES[self.size_index])
         self.count = 0
+        self.tombstones = tombstones
+        self.tombstone_count = 0
+        self.probe_stats: ProbeStats|None = None
+        self._allocate(self.TABLE_SIZES[self.size_index])
+
+    def _allocate(self, table_size: int) -> None:
+        """
+        Replace the slot storage with empty storage of the given size.
+
+        :complexity: O(table_size)
+        """
+        self.array:ArrayR[tuple[K, V, int]] = ArrayR(table_size)
+
+    def full_hash(self, key: K) -> int:
+        """
+        Hash a key independently of the current table size.
+
+        Every slot stores this next to its key and value, so probes can
+        reject other keys without a full comparison and a rehash only has
+        to reduce it modulo the new size.
+
+        :complexity: See HASH_STRATEGY, O(len(key)) by default.
+        """
+        return self.HASH_STRATEGY.full_hash(key)
+
+    def _full_hashes(self, keys: list[K]) -> list[int]:
+        """
+        Full hashes of many keys, computed as one batch unless `full_hash`
+        has been overridden.
+
+        :complexity: See HASH_STRATEGY.hash_many.
+        """
+        if type(self).full_hash is LinearProbeTable.full_hash and self._hash_is_default():
+            return self.HASH_STRATEGY.hash_many(keys)
+        return [self._key_hash(key) for key in keys]
+
+    def _key_hash(self, key: K) -> int:
+        """
+        The full hash cached for key. Once `hash` is overridden, keys which
+        `full_hash` cannot hash, such as ints under the default strategy,
+        cache _NO_FULL_HASH instead.
+
+        :complexity: See full_hash.
+        :raises TypeError: when full_hash cannot hash the key and `hash`
+            is not overridden.
+        """
+        try:
+            return self.full_hash(key)
+        except (TypeError, AttributeError):
+            if self._hash_is_default():
+                raise
+            return _NO_FULL_HASH
 
     def hash(self, key: K) -> int:
         """
@@ -50,13 +161,24 @@ class LinearProbeTable(Generic[K, V]):
 
         :complexity: O(len(key))
         """
+        return self.full_hash(key) % self.table_size
+
+    def _hash_is_default(self) -> bool:
+        """
+        Whether positions can be taken straight from a cached full hash.
+        Not the case once `hash` is overridden or assigned onto the instance.
+        """
+        return "hash" not in self.__dict__ and type(self).hash is LinearProbeTable.hash
+
+    def _home(self, key: K, full_hash: int) -> int:
+        """
+        Initial probe position for a key whose full hash is already known.
 
-        value = 0
-        a = 31415
-        for char in key:
-            value = (ord(char) + a * value) % self.table_size
-            a = a * self.HASH_BASE % (self.table_size - 1)
-        return value
+        :complexity: O(1) unless `hash` has been overridden.
+        """
+        if self._hash_is_default():
+            return full_hash % self.table_size
+        return self.hash(key)
 
     @property
     def table_size(self) -> int:
@@ -80,23 +202,47 @@ class LinearProbeTable(Generic[K, V]):
         :raises KeyError: When the key is not in the table, but is_insert is False.
         :raises FullError: When a table is full and cannot be inserted.
         """
-        # Initial position
-        position = self.hash(key)
+        return self._probe(key, self._key_hash(key), is_insert)
+
+    def _probe(self, key: K, full_hash: int, is_insert: bool) -> int:
+        """
+        Linear probe for a key whose full hash has already been computed.
+        Slots are only compared by key when their cached full hash matches.
+        Inserts of new keys reuse the first tombstone passed, if any.
 
-        for _ in range(self.table_size):
-            if self.array[position] is None:
+        :complexity: See linear probe, without the cost of hashing.
+        :raises KeyError: When the key is not in the table, but is_insert is False.
+        :raises FullError: When a table is full and cannot be inserted.
+        """
+        # Initial position
+        position = self._home(key, full_hash)
+        reusable = None
+
+        for probes in range(1, self.table_size + 1):
+            item = self.array[position]
+            if item is None:
+                if self.probe_stats is not None:
+                    self.probe_stats.record_probe(False, probes)
                 # Empty spot. Am I upserting or retrieving?
                 if is_insert:
-                    return position
+                    return position if reusable is None else reusable
                 else:
                     raise KeyError(key)
-            elif self.array[position][0] == key:
+            elif item[2] == full_hash and item[0] == key:
+                if self.probe_stats is not None:
+                    self.probe_stats.record_probe(True, probes)
                 return position
             else:
+                if item is _TOMBSTONE and reusable is None:
+                    reusable = position
                 # Taken by something else. Time to linear probe.
                 position = (position + 1) % self.table_size
 
-        if is_insert:
+        if self.probe_stats is not None:
+            self.probe_stats.record_probe(False, self.table_size)
+        if is_insert and reusable is not None:
+            return reusable
+        elif is_insert:
             raise FullError("Table is full!")
         else:
             raise KeyError(key)
@@ -109,10 +255,22 @@ class LinearProbeTable(Generic[K, V]):
         """
         res = []
         for x in range(self.table_size):
-            if self.array[x] is not None:
+            if self.array[x] is not None and self.array[x] is not _TOMBSTONE:
                 res.append(self.array[x][0])
         return res
     
+    def iter_items(self) -> Iterator[tuple[K, V]]:
+        """
+        Returns an iterator of all (key, value) pairs in the hash table,
+        read from the slots as it goes.
+        The table must not be changed while the iterator is in use.
+
+        :complexity: O(N) over the whole iteration, where N is self.table_size.
+        """
+        for item in self.array:
+            if item is not None and item is not _TOMBSTONE:
+                yield item[0], item[1]
+
     def table_state(self):
         res = []
         for i in self.array:
@@ -127,7 +285,7 @@ class LinearProbeTable(Generic[K, V]):
         """
         res = []
         for x in range(self.table_size):
-            if self.array[x] is not None:
+            if self.array[x] is not None and self.array[x] is not _TOMBSTONE:
                 res.append(self.array[x][1])
         return res
 
@@ -154,6 +312,22 @@ class LinearProbeTable(Generic[K, V]):
         position = self._linear_probe(key, False)
         return self.array[position][1]
 
+    def _value_at(self, position: int) -> V:
+        return self.array[position][1]
+
+    def get_many(self, keys: Iterable[K]) -> list[V]:
+        """
+        Get the values of many keys at once, hashing them as one batch.
+
+        :complexity: See hash_many, plus a linear probe per key.
+        :raises KeyError: when any of the keys doesn't exist.
+        """
+        keys = list(keys)
+        return [
+            self._value_at(self._probe(key, full_hash, False))
+            for key, full_hash in zip(keys, self._full_hashes(keys))
+        ]
+
     def __setitem__(self, key: K, data: V) -> None:
         """
         Set an (key, value) pair in our hash table.
@@ -161,16 +335,79 @@ class LinearProbeTable(Generic[K, V]):
         :complexity: See linear probe.
         :raises FullError: when the table cannot be resized further.
         """
+        self._insert(key, data, self._key_hash(key))
 
-        position = self._linear_probe(key, True)
+        if len(self) > self.table_size * self.MAX_LOAD_FACTOR:
+            self._rehash()
+
+    def _insert(self, key: K, data: V, full_hash: int) -> None:
+        """
+        Insert or update a key whose full hash is known, without resizing.
+
+        :complexity: See linear probe, without the cost of hashing.
+        :raises FullError: when the table is full.
+        """
+        position = self._probe(key, full_hash, True)
 
         if self.array[position] is None:
             self.count += 1
+        elif self.array[position] is _TOMBSTONE:
+            self.count += 1
+            self.tombstone_count -= 1
 
-        self.array[position] = (key, data)
+        self.array[position] = (key, data, full_hash)
 
-        if len(self) > self.table_size / 2:
-            self._rehash()
+    @classmethod
+    def from_items(cls, iterable: Iterable[tuple[K, V]], expected_size: int|None = None, **kwargs) -> LinearProbeTable[K, V]:
+        """
+        Build a table from (key, value) pairs, sized for all of them up front.
+        Any keyword arguments are passed on to the constructor.
+
+        :complexity: See update_many.
+        """
+        table = cls(**kwargs)
+        table.update_many(iterable, expected_size)
+        return table
+
+    def update_many(self, iterable: Iterable[tuple[K, V]], expected_size: int|None = None) -> None:
+        """
+        Set many (key, value) pairs at once.
+
+        The table is first resized, at most once, to the size it will end
+        up at, and every pair is then placed without further resizing.
+        Keys are hashed together as one batch.
+        expected_size defaults to the number of pairs. A low expected_size
+        is safe, the table then grows as usual.
+
+        :complexity: O(N + M*hash(K)) plus probing, where N is the current
+            table size and M is the number of pairs.
+        :raises FullError: when the table cannot be resized further.
+        """
+        pairs = list(iterable)
+        if expected_size is None:
+            expected_size = len(pairs)
+        self._reserve(self.count + expected_size)
+        full_hashes = self._full_hashes([key for key, _ in pairs])
+        for (key, data), full_hash in zip(pairs, full_hashes):
+            self._insert(key, data, full_hash)
+            if len(self) > self.table_size * self.MAX_LOAD_FACTOR:
+                self._rehash()
+
+    def _reserve(self, count: int) -> None:
+        """
+        Resize straight to the first table size which holds count entries
+        without passing the load factor, or the largest size if none do.
+
+        :complexity: O(N + M) where N is the current table size and M is
+            the new one, or O(1) if the table is already big enough.
+        """
+        size_index = self.size_index
+        while (size_index < len(self.TABLE_SIZES) - 1
+               and count > self.TABLE_SIZES[size_index] * self.MAX_LOAD_FACTOR):
+            size_index += 1
+        if size_index > self.size_index:
+            self.size_index = size_index
+            self._timed_rebuild(self.TABLE_SIZES[size_index])
 
     def __delitem__(self, key: K) -> None:
         """
@@ -178,20 +415,39 @@ class LinearProbeTable(Generic[K, V]):
 
         :complexity best: O(hash(key)) deleting item is not probed and in correct spot.
         :complexity worst: O(N*hash(key)+N^2*comp(K)) deleting item is midway through large chain.
+            With tombstones the cluster is left alone, so the worst case is a
+            probe plus the occasional O(N) compaction or shrink.
         :raises KeyError: when the key doesn't exist.
         """
         position = self._linear_probe(key, False)
+        self._remove(position)
+        shrunk = (self.MIN_LOAD_FACTOR is not None and len(self) < self.table_size * self.MIN_LOAD_FACTOR
+                  and self._shrink())
+        if not shrunk and self.tombstone_count > self.table_size * self.TOMBSTONE_LIMIT:
+            self._compact()
+
+    def _remove(self, position: int) -> None:
+        """
+        Remove the entry at position, leaving a tombstone or repairing
+        the rest of its cluster.
+
+        :complexity: See __delitem__.
+        """
+        self.count -= 1
+        if self.tombstones:
+            self.array[position] = _TOMBSTONE
+            self.tombstone_count += 1
+            return
         # Remove the element
         self.array[position] = None
-        self.count -= 1
         # Start moving over the cluster
         position = (position + 1) % self.table_size
         while self.array[position] is not None:
-            key2, value = self.array[position]
+            item = self.array[position]
             self.array[position] = None
-            # Reinsert.
-            newpos = self._linear_probe(key2, True)
-            self.array[newpos] = (key2, value)
+            # Reinsert, reusing the cached hash.
+            newpos = self._probe(item[0], item[2], True)
+            self.array[newpos] = item
             position = (position + 1) % self.table_size
 
     def is_empty(self) -> bool:
@@ -204,22 +460,152 @@ class LinearProbeTable(Generic[K, V]):
         """
         Need to resize table and reinsert all values
 
-        :complexity best: O(N*hash(K)) No probing.
-        :complexity worst: O(N*hash(K) + N^2*comp(K)) Lots of probing.
+        Keys are not hashed again: each entry is moved, tuple and all, to the
+        first free slot from its cached full hash reduced to the new size.
+        Keys are all distinct so they never need comparing.
+
+        :complexity best: O(N) No probing.
+        :complexity worst: O(N^2) Lots of probing.
         Where N is len(self)
         """
-        old_array = self.array
         self.size_index += 1
         if self.size_index >= len(self.TABLE_SIZES):
             # Cannot be resized further.
             return
+        self._timed_rebuild(self.TABLE_SIZES[self.size_index])
 
-        self.array = ArrayR(self.TABLE_SIZES[self.size_index])
-        self.count = 0
+    def _shrink(self) -> bool:
+        """
+        Rehash down the TABLE_SIZES ladder to the smallest size at which the
+        table is at most half of MAX_LOAD_FACTOR full. Returns whether it
+        did, which also clears any tombstones.
+
+        :complexity: See _rehash.
+        """
+        size_index = min(self.size_index, len(self.TABLE_SIZES) - 1)
+        while size_index > 0 and self.count <= self.TABLE_SIZES[size_index - 1] * self.MAX_LOAD_FACTOR / 2:
+            size_index -= 1
+        if self.TABLE_SIZES[size_index] < self.table_size:
+            self.size_index = size_index
+            self._timed_rebuild(self.TABLE_SIZES[size_index])
+            return True
+        return False
+
+    def _compact(self) -> None:
+        """
+        Clear out all tombstones by rebuilding the table at its current size.
+
+        :complexity: See _rehash.
+        """
+        self._timed_rebuild(self.table_size)
+
+    def _timed_rebuild(self, table_size: int) -> None:
+        """
+        Rebuild at the given size, recording it if stats are enabled.
+
+        :complexity: See _rebuild.
+        """
+        if self.probe_stats is None:
+            self._rebuild(table_size)
+            return
+        start = perf_counter()
+        self._rebuild(table_size)
+        self.probe_stats.record_rehash(perf_counter() - start)
+
+    def _rebuild(self, table_size: int) -> None:
+        """
+        Move all live entries into a fresh array of the given size,
+        dropping any tombstones.
+
+        :complexity: See _rehash.
+        """
+        old_array = self.array
+        self._allocate(table_size)
+        self.tombstone_count = 0
+        use_cached = self._hash_is_default()
         for item in old_array:
-            if item is not None:
-                key, value = item
-                self[key] = value
+            if item is not None and item is not _TOMBSTONE:
+                if use_cached:
+                    position = item[2] % table_size
+                else:
+                    position = self.hash(item[0])
+                while self.array[position] is not None:
+                    position = (position + 1) % table_size
+                self.array[position] = item
+
+    def enable_stats(self) -> None:
+        """
+        Start recording probe lengths and rehashes, from zero.
+        """
+        self.probe_stats = ProbeStats()
+
+    def disable_stats(self) -> None:
+        """
+        Stop recording, discarding anything recorded so far.
+        """
+        self.probe_stats = None
+
+    def stats(self) -> dict:
+        """
+        Report on the shape of the table and, if stats are enabled, what
+        has been recorded since. Everything is a plain int, float or list,
+        so the result can be passed straight to json.dumps.
+
+        :complexity: O(N) where N is the table size, to find the longest cluster.
+        """
+        res = {
+            "table_size": self.table_size,
+            "count": len(self),
+            "tombstones": self.tombstone_count,
+            "load_factor": len(self) / self.table_size,
+            "max_cluster": max_cluster(self.array[x] is not None for x in range(self.table_size)),
+        }
+        res.update((self.probe_stats or ProbeStats()).to_dict())
+        return res
+
+    def stats_json(self, **kwargs) -> str:
+        """
+        stats() as JSON. Keyword arguments are passed on to json.dumps.
+
+        :complexity: See stats.
+        """
+        return json.dumps(self.stats(), **kwargs)
+
+    def _entries(self) -> Iterator[tuple[K, V, int]]:
+        """
+        The (key, value, hash) tuples this table allocated to hold its entries.
+        """
+        for item in self.array:
+            if item is not None and item is not _TOMBSTONE:
+                yield item
+
+    def memory_footprint(self, seen: set[int]|None = None) -> dict[str, int]:
+        """
+        Bytes used by the table, broken down into the table object itself
+        ("table"), its slot arrays ("slots"), the tuples holding entries
+        ("entries"), its keys and its values, all of which make up "total".
+        Keys and values are measured deeply, through any containers and
+        objects they hold. "nested" is always 0 here.
+
+        Every object is counted once. Objects whose ids are in `seen` are
+        left out, and those counted are added to it, so passing the same
+        set to several tables counts the objects they share only once.
+
+        :complexity: O(N + M) where N is the table size and M the number
+            of objects reachable from the keys and values.
+        """
+        seen = set() if seen is None else seen
+        res = new_footprint()
+        res["table"] = shallow_size(self, seen) + shallow_size(vars(self), seen) + deep_size(self.probe_stats, seen)
+        for value in vars(self).values():
+            if isinstance(value, (ArrayR, ArrayN)):
+                res["slots"] += array_size(value, seen)
+        for entry in self._entries():
+            res["entries"] += shallow_size(entry, seen)
+        for key, value in self.iter_items():
+            res["keys"] += deep_size(key, seen)
+            res["values"] += deep_size(value, seen)
+        return total(res)
 
     def __str__(self) -> str:
         """
@@ -229,7 +615,7 @@ class LinearProbeTable(Generic[K, V]):
         """
         result = ""
         for item in self.array:
-            if item is not None:
-                (key, value) = item
+            if item is not None and item is not _TOMBSTONE:
+                (key, value, _) = item
                 result += "(" + str(key) + "," + str(value) + ")\n"
         return result
@@ -0,0 +1,123 @@
+""" Memory Footprint
+
+Byte counting behind the tables' memory_footprint methods. Sizes are
+CPython's own, from sys.getsizeof, and every object is counted at most
+once, tracked by id in a `seen` set which can be shared between calls.
+"""
+from __future__ import annotations
+
+import sys
+from ctypes import sizeof
+from types import FunctionType, MethodType, ModuleType
+
+from data_structures.referential_array import ArrayR, ArrayN, SparseArrayR
+
+# Parts of a table reported by memory_footprint, before the "total".
+FIELDS = ("table", "slots", "entries", "nested", "keys", "values")
+
+# Never counted: singletons, and code or classes rather than data.
+_SKIP = (type, ModuleType, FunctionType, MethodType, type(None), bool)
+
+
+def new_footprint() -> dict[str, int]:
+    """
+    A footprint with every part at zero.
+    """
+    return dict.fromkeys(FIELDS, 0)
+
+
+def total(footprint: dict[str, int]) -> dict[str, int]:
+    """
+    Set footprint["total"] to the sum of its parts, and return it.
+    """
+    footprint["total"] = sum(footprint[field] for field in FIELDS)
+    return footprint
+
+
+def add_nested(footprint: dict[str, int], nested: dict[str, int]) -> None:
+    """
+    Add the footprint of a table nested in another to it. The nested
+    table's own storage counts as "nested", its keys and values as keys
+    and values.
+    """
+    footprint["nested"] += nested["total"] - nested["keys"] - nested["values"]
+    footprint["keys"] += nested["keys"]
+    footprint["values"] += nested["values"]
+
+
+def shallow_size(obj: object, seen: set[int]) -> int:
+    """
+    Size of obj alone, or 0 if it has already been seen.
+
+    :complexity: O(1)
+    """
+    if obj is None or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    return sys.getsizeof(obj)
+
+
+def array_size(array: ArrayR|ArrayN|SparseArrayR, seen: set[int]) -> int:
+    """
+    Size of an ArrayR, ArrayN or SparseArrayR including the storage behind
+    it, but not the objects an ArrayR or SparseArrayR refers to.
+
+    :complexity: O(1)
+    """
+    if id(array) in seen:
+        return 0
+    if isinstance(array, SparseArrayR):
+        return (shallow_size(array, seen) + shallow_size(array.bitmap, seen)
+                + shallow_size(array.children, seen))
+    size = shallow_size(array, seen) + shallow_size(vars(array), seen)
+    if isinstance(array, ArrayR) and id(array.array) not in seen:
+        # ctypes keeps the references in a buffer getsizeof leaves out.
+        size += sizeof(array.array)
+    return size + shallow_size(array.array, seen)
+
+
+def deep_size(obj: object, seen: set[int]) -> int:
+    """
+    Size of obj and everything reachable from it through containers and
+    instance attributes, leaving out anything already seen. Walks with an
+    explicit stack, so deeply nested objects cannot hit the recursion limit.
+
+    :complexity: O(N) where N is the number of objects reached.
+    """
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, _SKIP) or id(obj) in seen:
+            continue
+        if isinstance(obj, (ArrayR, ArrayN, SparseArrayR)):
+            size += array_size(obj, seen)
+            if isinstance(obj, ArrayR):
+                stack.extend(obj.array)
+            elif isinstance(obj, SparseArrayR):
+                stack.extend(obj.children)
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, int, float, complex)):
+            continue
+        elif isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(vars(obj))
+            stack.extend(_slot_values(obj))
+    return size
+
+
+def _slot_values(obj: object) -> list[object]:
+    res = []
+    for cls in type(obj).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ("__dict__", "__weakref__") and hasattr(obj, name):
+                res.append(getattr(obj, name))
+    return res
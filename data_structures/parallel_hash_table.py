@@ -0,0 +1,272 @@
+""" Parallel Array Hash Table
+
+Defines a Linear Probe Table which keeps keys, values and cached hashes in
+three parallel arrays instead of one array of tuples.
+"""
+from __future__ import annotations
+
+from typing import TypeVar, Iterator
+
+from data_structures.hash_table import LinearProbeTable, FullError, _TOMBSTONE
+from data_structures.referential_array import ArrayR, ArrayN
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+# Key stored in a slot freed by a tombstone delete.
+_DELETED = _TOMBSTONE[0]
+# Hash stored in an empty slot. Tombstones store -1, live entries their
+# (non-negative) full hash.
+_EMPTY_HASH = -2
+
+
+class ParallelLinearProbeTable(LinearProbeTable[K, V]):
+    """
+    Linear Probe Table with struct-of-arrays storage.
+
+    Slot i is described by key_array[i], value_array[i] and hash_array[i].
+    Overwriting a value writes a single slot without allocating anything,
+    and keys()/values() each walk only the array they need.
+
+    Probing, resizing and deletion (including tombstones) behave exactly as
+    in LinearProbeTable, so the two can be used interchangeably.
+    `array` is kept as a read-only view of the slots as tuples, for code
+    which inspects slots directly.
+
+    Unless stated otherwise, all methods have O(1) complexity.
+    """
+
+    def _allocate(self, table_size: int) -> None:
+        """
+        Replace the slot storage with empty storage of the given size.
+
+        :complexity: O(table_size)
+        """
+        self.key_array:ArrayR[K] = ArrayR(table_size)
+        self.value_array:ArrayR[V] = ArrayR(table_size)
+        self.hash_array = ArrayN(table_size, 'q', _EMPTY_HASH)
+
+    @property
+    def table_size(self) -> int:
+        return len(self.key_array)
+
+    @property
+    def array(self) -> SlotView:
+        """
+        Read-only view of the slots as (key, value, hash) tuples.
+        Each access builds a tuple, so this is for inspection only.
+        """
+        return SlotView(self)
+
+    def _probe(self, key: K, full_hash: int, is_insert: bool) -> int:
+        """
+        Linear probe for a key whose full hash has already been computed.
+        Slots are only compared by key when their cached full hash matches.
+        Inserts of new keys reuse the first tombstone passed, if any.
+
+        :complexity: See linear probe, without the cost of hashing.
+        :raises KeyError: When the key is not in the table, but is_insert is False.
+        :raises FullError: When a table is full and cannot be inserted.
+        """
+        key_array = self.key_array
+        hash_array = self.hash_array
+        table_size = self.table_size
+        position = self._home(key, full_hash)
+        reusable = None
+
+        for probes in range(1, table_size + 1):
+            slot_key = key_array[position]
+            if slot_key is None:
+                if self.probe_stats is not None:
+                    self.probe_stats.record_probe(False, probes)
+                if is_insert:
+                    return position if reusable is None else reusable
+                else:
+                    raise KeyError(key)
+            elif hash_array[position] == full_hash and slot_key == key:
+                if self.probe_stats is not None:
+                    self.probe_stats.record_probe(True, probes)
+                return position
+            else:
+                if slot_key is _DELETED and reusable is None:
+                    reusable = position
+                position = (position + 1) % table_size
+
+        if self.probe_stats is not None:
+            self.probe_stats.record_probe(False, table_size)
+        if is_insert and reusable is not None:
+            return reusable
+        elif is_insert:
+            raise FullError("Table is full!")
+        else:
+            raise KeyError(key)
+
+    def keys(self) -> list[K]:
+        """
+        Returns all keys in the hash table.
+
+        :complexity: O(N) where N is self.table_size.
+        """
+        return [key for key in self.key_array if key is not None and key is not _DELETED]
+
+    def iter_items(self) -> Iterator[tuple[K, V]]:
+        """
+        See LinearProbeTable.iter_items.
+
+        :complexity: O(N) over the whole iteration, where N is self.table_size.
+        """
+        for x in range(self.table_size):
+            key = self.key_array[x]
+            if key is not None and key is not _DELETED:
+                yield key, self.value_array[x]
+
+    def values(self) -> list[V]:
+        """
+        Returns all values in the hash table.
+
+        :complexity: O(N) where N is self.table_size.
+        """
+        res = []
+        for x in range(self.table_size):
+            if self.hash_array[x] >= 0:
+                res.append(self.value_array[x])
+        return res
+
+    def __getitem__(self, key: K) -> V:
+        """
+        Get the value at a certain key
+
+        :complexity: See linear probe.
+        :raises KeyError: when the key doesn't exist.
+        """
+        return self.value_array[self._linear_probe(key, False)]
+
+    def _value_at(self, position: int) -> V:
+        return self.value_array[position]
+
+    def _insert(self, key: K, data: V, full_hash: int) -> None:
+        """
+        Insert or update a key whose full hash is known, without resizing.
+        Updating an existing key only writes its value slot.
+
+        :complexity: See linear probe, without the cost of hashing.
+        :raises FullError: when the table is full.
+        """
+        position = self._probe(key, full_hash, True)
+
+        slot_key = self.key_array[position]
+        if slot_key is None or slot_key is _DELETED:
+            if slot_key is _DELETED:
+                self.tombstone_count -= 1
+            self.count += 1
+            self.key_array[position] = key
+            self.hash_array[position] = full_hash
+        self.value_array[position] = data
+
+    def _remove(self, position: int) -> None:
+        """
+        Remove the entry at position, leaving a tombstone or repairing
+        the rest of its cluster.
+
+        :complexity: See LinearProbeTable.__delitem__
+        """
+        self.count -= 1
+        if self.tombstones:
+            self.key_array[position] = _DELETED
+            self.value_array[position] = None
+            self.hash_array[position] = -1
+            self.tombstone_count += 1
+            return
+        self._clear(position)
+        # Start moving over the cluster
+        position = (position + 1) % self.table_size
+        while self.key_array[position] is not None:
+            key2 = self.key_array[position]
+            value = self.value_array[position]
+            full_hash = self.hash_array[position]
+            self._clear(position)
+            # Reinsert, reusing the cached hash.
+            newpos = self._probe(key2, full_hash, True)
+            self.key_array[newpos] = key2
+            self.value_array[newpos] = value
+            self.hash_array[newpos] = full_hash
+            position = (position + 1) % self.table_size
+
+    def _slot(self, position: int) -> tuple[K, V, int]|None:
+        """
+        The slot at position as it would be stored by LinearProbeTable.
+        """
+        key = self.key_array[position]
+        if key is None:
+            return None
+        elif key is _DELETED:
+            return _TOMBSTONE
+        return (key, self.value_array[position], self.hash_array[position])
+
+    def _entries(self) -> Iterator[tuple[K, V, int]]:
+        """
+        None: entries are spread over the arrays, not kept in tuples.
+        """
+        return iter(())
+
+    def _clear(self, position: int) -> None:
+        self.key_array[position] = None
+        self.value_array[position] = None
+        self.hash_array[position] = _EMPTY_HASH
+
+    def _rebuild(self, table_size: int) -> None:
+        """
+        Move all live entries into fresh arrays of the given size,
+        dropping any tombstones.
+
+        :complexity: See LinearProbeTable._rehash.
+        """
+        old_keys, old_values, old_hashes = self.key_array, self.value_array, self.hash_array
+        self._allocate(table_size)
+        self.tombstone_count = 0
+        use_cached = self._hash_is_default()
+        key_array = self.key_array
+        for x in range(len(old_keys)):
+            key = old_keys[x]
+            if key is not None and key is not _DELETED:
+                if use_cached:
+                    position = old_hashes[x] % table_size
+                else:
+                    position = self.hash(key)
+                while key_array[position] is not None:
+                    position = (position + 1) % table_size
+                key_array[position] = key
+                self.value_array[position] = old_values[x]
+                self.hash_array[position] = old_hashes[x]
+
+    def __str__(self) -> str:
+        """
+        Returns all the key/value pairs in our hash table (no particular
+        order).
+        :complexity: O(N * (str(key) + str(value))) where N is the table size
+        """
+        result = ""
+        for x in range(self.table_size):
+            key = self.key_array[x]
+            if key is not None and key is not _DELETED:
+                result += "(" + str(key) + "," + str(self.value_array[x]) + ")\n"
+        return result
+
+
+class SlotView:
+    """
+    Read-only, ArrayR-like view of the slots of a table which doesn't store
+    them as tuples. Empty slots read as None, others as (key, value, hash)
+    tuples, built by the table's `_slot` method.
+    """
+
+    def __init__(self, table: LinearProbeTable) -> None:
+        self.table = table
+
+    def __len__(self) -> int:
+        return self.table.table_size
+
+    def __getitem__(self, index: int) -> tuple|None:
+        if not -self.table.table_size <= index < self.table.table_size:
+            raise IndexError(index)
+        return self.table._slot(index % self.table.table_size)
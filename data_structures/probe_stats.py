@@ -0,0 +1,88 @@
+""" Probe Statistics
+
+Counters the hash tables fill in when stats are enabled on them, so that
+table sizes and hash functions can be tuned against real keys.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+
+class ProbeStats:
+    """
+    Probe length histograms and rehash counters for one table.
+
+    hits[n] is the number of probes which found their key after looking at
+    n slots, and misses[n] the number which gave up (or found somewhere to
+    insert a new key) after n slots. Rehashes count every rebuild of the
+    table, whether it grew, shrank or was compacted.
+    """
+
+    def __init__(self) -> None:
+        self.hits: list[int] = [0]
+        self.misses: list[int] = [0]
+        self.rehashes = 0
+        self.rehash_time = 0.0
+
+    def record_probe(self, found: bool, length: int) -> None:
+        """
+        Count a probe which looked at `length` slots.
+
+        :complexity: O(1) amortised.
+        """
+        histogram = self.hits if found else self.misses
+        if length >= len(histogram):
+            histogram.extend([0] * (length + 1 - len(histogram)))
+        histogram[length] += 1
+
+    def record_rehash(self, seconds: float) -> None:
+        self.rehashes += 1
+        self.rehash_time += seconds
+
+    def merge(self, other: ProbeStats) -> None:
+        """
+        Add the counts of other into these.
+
+        :complexity: O(H) where H is the longest probe other recorded.
+        """
+        for mine, theirs in ((self.hits, other.hits), (self.misses, other.misses)):
+            if len(theirs) > len(mine):
+                mine.extend([0] * (len(theirs) - len(mine)))
+            for length, count in enumerate(theirs):
+                mine[length] += count
+        self.rehashes += other.rehashes
+        self.rehash_time += other.rehash_time
+
+    def to_dict(self) -> dict:
+        return {
+            "hits": list(self.hits),
+            "misses": list(self.misses),
+            "rehashes": self.rehashes,
+            "rehash_time": self.rehash_time,
+        }
+
+
+def max_cluster(occupied: Iterable[bool]) -> int:
+    """
+    Length of the longest run of occupied slots, wrapping around the end
+    of the table as probes do.
+
+    :complexity: O(N) where N is the table size.
+    """
+    longest = run = first_run = 0
+    at_start = True
+    size = 0
+    for slot in occupied:
+        size += 1
+        if slot:
+            run += 1
+            longest = max(longest, run)
+        else:
+            if at_start:
+                first_run = run
+                at_start = False
+            run = 0
+    if at_start:
+        # Every slot is occupied.
+        return size
+    return max(longest, run + first_run)
@@ -12,15 +12,37 @@ space to hold the references.
 Note that while I do check the precondition in __init__ (noone else
 would), I do not check that of getitem or setitem, since that is already
 checked by self.array[index].
+
+The references are set to None by slice assignment from [None] * length,
+which is built in C, rather than from a list built one element at a time.
+copy_from and resize likewise move references a slice at a time.
+
+ArrayN is the numeric sibling of ArrayR, for payloads such as cached
+hashes or probe distances. It is backed by the array module, so each
+element takes a fixed number of bytes rather than a reference to an int
+object, and bulk copies go through memoryviews.
+
+SparseArrayR reads and writes like an ArrayR of references, for arrays
+which are mostly None. Only the positions set to something else are
+stored: a bitmap has a bit set for each of them, and their references
+are packed in order into a list, so the one for position i is at the
+number of bits set below bit i.
 """
+from __future__ import annotations
+
 __author__ = "Julian Garcia for the __init__ code, Maria Garcia de la Banda for the rest"
 __docformat__ = 'reStructuredText'
 
+from array import array
 from ctypes import py_object
-from typing import TypeVar, Generic
+from typing import Iterator, TypeVar, Generic
 
 T = TypeVar('T')
 
+# Number of bits set in a non-negative int. int.bit_count is only there
+# from Python 3.10.
+_popcount = getattr(int, "bit_count", lambda x: bin(x).count("1"))
+
 
 class ArrayR(Generic[T]):
     def __init__(self, length: int) -> None:
@@ -31,7 +53,7 @@ class ArrayR(Generic[T]):
         if length <= 0:
             raise ValueError("Array length should be larger than 0.")
         self.array = (length * py_object)() # initialises the space
-        self.array[:] =  [None for _ in range(length)]
+        self.array[:] = [None] * length
 
     def __len__(self) -> int:
         """ Returns the length of the array
@@ -53,3 +75,165 @@ class ArrayR(Generic[T]):
         """
         self.array[index] = value
 
+    def copy_from(self, other: ArrayR[T], count: int|None = None, start: int = 0) -> None:
+        """ Copies the first count references of other into this array,
+        starting at position start. count defaults to as many as fit.
+        :complexity: O(count), done as one slice assignment.
+        :pre: start + count <= len(self) and count <= len(other)
+        """
+        if count is None:
+            count = min(len(other), len(self) - start)
+        if start < 0 or count < 0 or start + count > len(self) or count > len(other):
+            raise IndexError("Copy does not fit in the array.")
+        self.array[start:start + count] = other.array[:count]
+
+    def resize(self, length: int) -> ArrayR[T]:
+        """ Returns a new array of the given length holding this array's
+        references, truncated or padded with None.
+        :complexity: O(length)
+        :pre: length > 0
+        """
+        res = ArrayR(length)
+        res.copy_from(self)
+        return res
+
+
+class ArrayN:
+    """ Array of numbers of one C type, zero-initialised unless given a fill.
+
+    typecode is as for the array module, e.g. 'q' for 64 bit signed ints
+    or 'i' for (at least) 32 bit signed ints.
+    """
+
+    def __init__(self, length: int, typecode: str = 'q', fill: int = 0) -> None:
+        """ Creates an array of the given length and type
+        :complexity: O(length), done in C.
+        :pre: length > 0
+        """
+        if length <= 0:
+            raise ValueError("Array length should be larger than 0.")
+        if fill == 0:
+            self.array = array(typecode, bytes(length * array(typecode).itemsize))
+        else:
+            self.array = array(typecode, [fill]) * length
+
+    @property
+    def typecode(self) -> str:
+        return self.array.typecode
+
+    def __len__(self) -> int:
+        """ Returns the length of the array
+        :complexity: O(1)
+        """
+        return len(self.array)
+
+    def __getitem__(self, index: int) -> int:
+        """ Returns the number in position index.
+        :complexity: O(1)
+        :pre: index in between 0 and length - self.array[] checks it
+        """
+        return self.array[index]
+
+    def __setitem__(self, index: int, value: int) -> None:
+        """ Sets the number in position index to value
+        :complexity: O(1)
+        :pre: index in between 0 and length - self.array[] checks it
+        :pre: value fits the array's type - self.array[] checks it
+        """
+        self.array[index] = value
+
+    def copy_from(self, other: ArrayN, count: int|None = None, start: int = 0) -> None:
+        """ Copies the first count numbers of other into this array,
+        starting at position start. count defaults to as many as fit.
+        :complexity: O(count), done as one memory copy.
+        :pre: both arrays have the same typecode
+        :pre: start + count <= len(self) and count <= len(other)
+        """
+        if count is None:
+            count = min(len(other), len(self) - start)
+        if start < 0 or count < 0 or start + count > len(self) or count > len(other):
+            raise IndexError("Copy does not fit in the array.")
+        memoryview(self.array)[start:start + count] = memoryview(other.array)[:count]
+
+    def resize(self, length: int, fill: int = 0) -> ArrayN:
+        """ Returns a new array of the given length holding this array's
+        numbers, truncated or padded with fill.
+        :complexity: O(length)
+        :pre: length > 0
+        """
+        res = ArrayN(length, self.typecode, fill)
+        res.copy_from(self)
+        return res
+
+
+class SparseArrayR(Generic[T]):
+    """ Array of references which only stores the positions not None.
+
+    Bit i of bitmap is set when position i holds a reference, and the
+    references are packed in position order into children. Position i's
+    reference is at children[popcount(bitmap & ((1 << i) - 1))], the
+    number of occupied positions before it.
+    """
+
+    __slots__ = ("length", "bitmap", "children")
+
+    def __init__(self, length: int) -> None:
+        """ Creates an array of references to objects of the given length,
+        all None, without allocating any of them.
+        :complexity: O(1)
+        :pre: length > 0
+        """
+        if length <= 0:
+            raise ValueError("Array length should be larger than 0.")
+        self.length = length
+        self.bitmap = 0
+        self.children: list[T] = []
+
+    def __len__(self) -> int:
+        """ Returns the length of the array
+        :complexity: O(1)
+        """
+        return self.length
+
+    def _check(self, index: int) -> int:
+        if not 0 <= index < self.length:
+            raise IndexError("invalid index")
+        return 1 << index
+
+    def __getitem__(self, index: int) -> T:
+        """ Returns the object in position index.
+        :complexity: O(1)
+        :pre: index in between 0 and length
+        """
+        if not 0 <= index < self.length:
+            raise IndexError("invalid index")
+        bitmap = self.bitmap
+        if bitmap >> index & 1:
+            return self.children[_popcount(bitmap & ((1 << index) - 1))]
+        return None
+
+    def __setitem__(self, index: int, value: T) -> None:
+        """ Sets the object in position index to value, storing or
+        dropping its reference when the position changes to or from None.
+        :complexity: O(n) where n is the number of positions not None.
+        :pre: index in between 0 and length
+        """
+        bit = self._check(index)
+        packed = _popcount(self.bitmap & (bit - 1))
+        if self.bitmap & bit:
+            if value is None:
+                self.bitmap ^= bit
+                del self.children[packed]
+            else:
+                self.children[packed] = value
+        elif value is not None:
+            self.bitmap |= bit
+            self.children.insert(packed, value)
+
+    def __iter__(self) -> Iterator[T]:
+        """ Yields every position's object in order, None included.
+        :complexity: O(length)
+        """
+        children = iter(self.children)
+        for index in range(self.length):
+            yield next(children) if self.bitmap >> index & 1 else None
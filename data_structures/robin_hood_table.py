@@ -0,0 +1,174 @@
+""" Robin Hood Hash Table
+
+Defines a Hash Table using Robin Hood linear probing for conflict resolution.
+"""
+from __future__ import annotations
+
+from typing import TypeVar
+
+from data_structures.hash_strategy import HashStrategy
+from data_structures.hash_table import LinearProbeTable, FullError
+from data_structures.referential_array import ArrayR, ArrayN
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+
+class RobinHoodTable(LinearProbeTable[K, V]):
+    """
+    Robin Hood Table.
+
+    A linear probe table where every entry records its probe distance, the
+    number of slots it sits past its home position. An insert that reaches
+    an entry closer to its home than the new one takes that slot and carries
+    the displaced entry onwards. This keeps probe lengths even, so the table
+    can run at a much higher load factor than LinearProbeTable.
+
+    This also means a lookup can stop at the first entry closer to its home
+    than the probe has come, and deletes shift the rest of the cluster back
+    one slot instead of reinserting it.
+
+    Type Arguments:
+        - K:    Key Type. In most cases should be string.
+                Otherwise `hash` should be overwritten.
+        - V:    Value Type.
+
+    Unless stated otherwise, all methods have O(1) complexity.
+    """
+
+    MAX_LOAD_FACTOR = 0.85
+
+    def __init__(self, sizes=None, max_load_factor: float|None = None, min_load_factor: float|None = None,
+                 hash_strategy: HashStrategy|None = None) -> None:
+        """
+        Initialise the Hash Table.
+        """
+        if max_load_factor is not None:
+            self.MAX_LOAD_FACTOR = max_load_factor
+        super().__init__(sizes, min_load_factor=min_load_factor, hash_strategy=hash_strategy)
+
+    def _allocate(self, table_size: int) -> None:
+        """
+        Replace the slot storage with empty storage of the given size.
+
+        :complexity: O(table_size)
+        """
+        self.array:ArrayR[tuple[K, V, int]] = ArrayR(table_size)
+        self.distances = ArrayN(table_size, 'i')
+
+    def _search(self, key: K, full_hash: int) -> tuple[int, int, bool]:
+        """
+        Look for a key whose full hash has already been computed.
+
+        :return: (position, distance, found). If the key is missing this is
+            where it would be inserted, and its probe distance there.
+        :complexity best: O(1) first position is the key, empty, or closer to home.
+        :complexity worst: O(N*comp(K)) where N is the longest probe distance.
+        """
+        position = self._home(key, full_hash)
+        distance = 0
+        for _ in range(self.table_size):
+            item = self.array[position]
+            if item is None or self.distances[position] < distance:
+                # Had the key been here, it would have taken this slot.
+                if self.probe_stats is not None:
+                    self.probe_stats.record_probe(False, distance + 1)
+                return position, distance, False
+            elif item[2] == full_hash and item[0] == key:
+                if self.probe_stats is not None:
+                    self.probe_stats.record_probe(True, distance + 1)
+                return position, distance, True
+            position = (position + 1) % self.table_size
+            distance += 1
+        if self.probe_stats is not None:
+            self.probe_stats.record_probe(False, distance)
+        return position, distance, False
+
+    def _probe(self, key: K, full_hash: int, is_insert: bool) -> int:
+        """
+        Find the position of this key, or where it would be inserted.
+
+        :complexity: See _search.
+        :raises KeyError: When the key is not in the table, but is_insert is False.
+        :raises FullError: When a table is full and cannot be inserted.
+        """
+        position, _, found = self._search(key, full_hash)
+        if found:
+            return position
+        elif not is_insert:
+            raise KeyError(key)
+        elif self.is_full():
+            raise FullError("Table is full!")
+        return position
+
+    def _place(self, position: int, item: tuple[K, V, int], distance: int) -> None:
+        """
+        Put an entry into the slot at position, which it reaches after
+        probing `distance` slots. Whatever was there is carried onwards,
+        swapping with any entry closer to its own home, until an empty slot.
+
+        :pre: The table is not full.
+        :complexity: O(N) where N is the length of the rest of the cluster.
+        """
+        while True:
+            current = self.array[position]
+            if current is None:
+                self.array[position] = item
+                self.distances[position] = distance
+                return
+            elif self.distances[position] < distance:
+                self.array[position], item = item, current
+                self.distances[position], distance = distance, self.distances[position]
+            position = (position + 1) % self.table_size
+            distance += 1
+
+    def _insert(self, key: K, data: V, full_hash: int) -> None:
+        """
+        Insert or update a key whose full hash is known, without resizing.
+
+        :complexity: See _search and _place.
+        :raises FullError: when the table is full.
+        """
+        position, distance, found = self._search(key, full_hash)
+        if found:
+            self.array[position] = (key, data, full_hash)
+            return
+        elif self.is_full():
+            raise FullError("Table is full!")
+
+        self._place(position, (key, data, full_hash), distance)
+        self.count += 1
+
+    def _remove(self, position: int) -> None:
+        """
+        Remove the entry at position, shifting the rest of the cluster back
+        a slot until an empty slot or an entry at home.
+
+        :complexity: O(N) where N is the length of the cluster.
+        """
+        self.count -= 1
+        following = (position + 1) % self.table_size
+        while self.array[following] is not None and self.distances[following] > 0:
+            self.array[position] = self.array[following]
+            self.distances[position] = self.distances[following] - 1
+            position = following
+            following = (following + 1) % self.table_size
+        self.array[position] = None
+        self.distances[position] = 0
+
+    def _rebuild(self, table_size: int) -> None:
+        """
+        Move all entries into a fresh array of the given size.
+
+        :complexity: See LinearProbeTable._rehash.
+        """
+        old_array = self.array
+        self._allocate(table_size)
+        use_cached = self._hash_is_default()
+        for item in old_array:
+            if item is not None:
+                if use_cached:
+                    position = item[2] % table_size
+                else:
+                    position = self.hash(item[0])
+                self._place(position, item, 0)
@@ -0,0 +1,183 @@
+""" Small Table
+
+Defines a table for a handful of entries, which is searched linearly
+instead of being hashed.
+"""
+from __future__ import annotations
+
+from typing import Generic, Iterable, Iterator, TypeVar
+
+from data_structures.memory_footprint import new_footprint, total, shallow_size, deep_size
+from data_structures.probe_stats import ProbeStats
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+
+class SmallTable(Generic[K, V]):
+    """
+    Small Table.
+
+    Keys and values are kept alternately in a single list, in insertion
+    order, with nothing else allocated per entry. Every operation compares
+    keys one at a time, so this only suits tables of a few entries, such as
+    the internal tables of a DoubleKeyTable which replaces them with a
+    LinearProbeTable once they grow.
+
+    Supports the parts of the LinearProbeTable interface DoubleKeyTable uses.
+    Positions are the entry's place in insertion order.
+
+    Unless stated otherwise, all methods have O(N*comp(K)) complexity, where
+    N is the number of entries.
+    """
+
+    __slots__ = ("items", "probe_stats")
+
+    def __init__(self, items: Iterable[tuple[K, V]] = ()) -> None:
+        """
+        Initialise the table with the given (key, value) pairs.
+        """
+        self.items: list = []
+        self.probe_stats: ProbeStats|None = None
+        for key, value in items:
+            self[key] = value
+
+    @property
+    def table_size(self) -> int:
+        return len(self)
+
+    @property
+    def array(self) -> list[tuple[K, V]]:
+        """
+        The entries as (key, value) tuples, in insertion order. For inspection only.
+        """
+        return list(self.iter_items())
+
+    def __len__(self) -> int:
+        """
+        :complexity: O(1)
+        """
+        return len(self.items) // 2
+
+    def is_empty(self) -> bool:
+        return len(self.items) == 0
+
+    def _linear_probe(self, key: K, is_insert: bool) -> int:
+        """
+        Find the position of this key, or where it would be inserted.
+
+        :raises KeyError: When the key is not in the table, but is_insert is False.
+        """
+        items = self.items
+        for position in range(len(items) // 2):
+            if items[2 * position] == key:
+                if self.probe_stats is not None:
+                    self.probe_stats.record_probe(True, position + 1)
+                return position
+        if self.probe_stats is not None:
+            self.probe_stats.record_probe(False, len(self))
+        if is_insert:
+            return len(self)
+        raise KeyError(key)
+
+    def __contains__(self, key: K) -> bool:
+        try:
+            self._linear_probe(key, False)
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, key: K) -> V:
+        """
+        :raises KeyError: when the key doesn't exist.
+        """
+        return self.items[2 * self._linear_probe(key, False) + 1]
+
+    def __setitem__(self, key: K, data: V) -> None:
+        """
+        Set a (key, value) pair. An update keeps the key's place in the order.
+        """
+        position = self._linear_probe(key, True)
+        if position == len(self):
+            self.items.append(key)
+            self.items.append(data)
+        else:
+            self.items[2 * position + 1] = data
+
+    def __delitem__(self, key: K) -> None:
+        """
+        :raises KeyError: when the key doesn't exist.
+        """
+        position = self._linear_probe(key, False)
+        del self.items[2 * position:2 * position + 2]
+
+    def keys(self) -> list[K]:
+        """
+        :complexity: O(N)
+        """
+        return self.items[0::2]
+
+    def values(self) -> list[V]:
+        """
+        :complexity: O(N)
+        """
+        return self.items[1::2]
+
+    def iter_items(self) -> Iterator[tuple[K, V]]:
+        """
+        See LinearProbeTable.iter_items.
+
+        :complexity: O(N) over the whole iteration.
+        """
+        items = self.items
+        for x in range(0, len(items), 2):
+            yield items[x], items[x + 1]
+
+    def enable_stats(self) -> None:
+        self.probe_stats = ProbeStats()
+
+    def disable_stats(self) -> None:
+        self.probe_stats = None
+
+    def stats(self) -> dict:
+        """
+        As LinearProbeTable.stats. Every entry is in one cluster.
+
+        :complexity: O(1)
+        """
+        res = {
+            "table_size": len(self),
+            "count": len(self),
+            "tombstones": 0,
+            "load_factor": 1.0 if len(self) else 0.0,
+            "max_cluster": len(self),
+        }
+        res.update((self.probe_stats or ProbeStats()).to_dict())
+        return res
+
+    def memory_footprint(self, seen: set[int]|None = None) -> dict[str, int]:
+        """
+        As LinearProbeTable.memory_footprint. The list of items counts as
+        the slots, and there are no entry tuples.
+
+        :complexity: O(N + M) where M is the number of objects reachable
+            from the keys and values.
+        """
+        seen = set() if seen is None else seen
+        res = new_footprint()
+        res["table"] = shallow_size(self, seen) + deep_size(self.probe_stats, seen)
+        res["slots"] = shallow_size(self.items, seen)
+        for key, value in self.iter_items():
+            res["keys"] += deep_size(key, seen)
+            res["values"] += deep_size(value, seen)
+        return total(res)
+
+    def __str__(self) -> str:
+        """
+        Returns all the key/value pairs in our table, in insertion order.
+        :complexity: O(N * (str(key) + str(value)))
+        """
+        result = ""
+        for key, value in self.iter_items():
+            result += "(" + str(key) + "," + str(value) + ")\n"
+        return result
@@ -0,0 +1,86 @@
+""" Polynomial String Hash
+
+The 31415/HASH_BASE polynomial hash used by all of the hash tables, along
+with a batch version for hashing many keys at once.
+
+hash_many uses NumPy when it is installed, and falls back to hashing one
+key at a time otherwise. Both give exactly the same values.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Above this table size `a * value` could overflow a 64 bit integer.
+NUMPY_TABLE_SIZE_LIMIT = 2 ** 31
+
+# How many keys are hashed together, bounding the size of the code arrays.
+BATCH_SIZE = 1 << 16
+
+
+def polynomial_hash(key: str, table_size: int, base: int = 31) -> int:
+    """
+    Hash a key into the range [0, table_size).
+
+    :complexity: O(len(key))
+    """
+    value = 0
+    a = 31415
+    for char in key:
+        value = (ord(char) + a * value) % table_size
+        a = a * base % (table_size - 1)
+    return value
+
+
+def hash_many(keys: Iterable[str], table_size: int, base: int = 31) -> list[int]:
+    """
+    Hash every key, giving the same values as polynomial_hash.
+
+    Keys are sorted longest first, so that the keys still being hashed at
+    character i are always a prefix of the batch, and then one character
+    position of every key is processed at a time with NumPy.
+
+    :complexity: O(N*L) where N is the number of keys and L the longest,
+        but with a per-character Python cost of O(L) rather than O(N*L).
+    """
+    keys = list(keys)
+    if (np is None or table_size > NUMPY_TABLE_SIZE_LIMIT
+            or not all(isinstance(key, str) for key in keys)):
+        return [polynomial_hash(key, table_size, base) for key in keys]
+    res = []
+    for start in range(0, len(keys), BATCH_SIZE):
+        res.extend(_hash_batch(keys[start:start + BATCH_SIZE], table_size, base))
+    return res
+
+
+def _hash_batch(keys: list[str], table_size: int, base: int) -> list[int]:
+    """
+    NumPy implementation of hash_many for a single batch of string keys.
+    """
+    lengths = np.fromiter(map(len, keys), dtype=np.int64, count=len(keys))
+    order = np.argsort(-lengths, kind="stable")
+    lengths = lengths[order]
+    max_length = int(lengths[0]) if len(keys) else 0
+
+    # Code points of all keys back to back, longest key first.
+    codes = np.frombuffer("".join([keys[i] for i in order]).encode("utf-32-le"), dtype=np.uint32)
+    offsets = np.zeros(len(keys), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+    # Number of keys longer than i, for each character position i.
+    active = np.searchsorted(-lengths, -np.arange(max_length), side="left")
+
+    values = np.zeros(len(keys), dtype=np.int64)
+    a = 31415
+    for i in range(max_length):
+        n = active[i]
+        chars = codes[offsets[:n] + i].astype(np.int64)
+        values[:n] = (chars + a * values[:n]) % table_size
+        a = a * base % (table_size - 1)
+
+    res = np.empty(len(keys), dtype=np.int64)
+    res[order] = values
+    return res.tolist()
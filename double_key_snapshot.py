@@ -0,0 +1,263 @@
+""" Double Key Table Snapshots
+
+Dumps a DoubleKeyTable with string keys into a fixed-layout binary file,
+which MappedDoubleKeyTable then serves straight from an mmap, without
+loading or hashing anything up front. Several processes mapping the same
+file share its pages.
+
+The file is, with every number little-endian:
+
+    header      HEADER
+    outer slots OUTER_SLOT * outer_size
+    inner slots INNER_SLOT * inner_size, for each key1 in outer slot order
+    strings     UTF-8 keys, each stored once
+    values      pickled values
+
+Both levels are linear probe tables at load factor at most 0.5, keyed by
+the same table-independent polynomial hash LinearProbeTable caches,
+reduced modulo the size of the table. An empty slot has hash -1.
+"""
+from __future__ import annotations
+
+import mmap
+import pickle
+import struct
+from typing import Iterator, TypeVar
+
+from data_structures.hash_table import LinearProbeTable
+from data_structures.string_hash import hash_many, polynomial_hash
+
+K1 = TypeVar('K1')
+K2 = TypeVar('K2')
+V = TypeVar('V')
+
+MAGIC = b"DKT\x00"
+FORMAT_VERSION = 1
+
+# magic, version, outer size, number of key1s, number of pairs, hash base,
+# then the offsets of the outer slots, strings and values.
+HEADER = struct.Struct("<4sIIIII3Q")
+# full hash, key offset, key length, inner slots offset, inner size, inner count
+OUTER_SLOT = struct.Struct("<iQIQII")
+# full hash, key offset, key length, value offset, value length
+INNER_SLOT = struct.Struct("<iQIQI")
+
+EMPTY = -1
+
+
+def _size_for(count: int) -> int:
+    """
+    The first LinearProbeTable size holding count entries without passing
+    its load factor.
+    """
+    for size in LinearProbeTable.TABLE_SIZES:
+        if count <= size * LinearProbeTable.MAX_LOAD_FACTOR:
+            return size
+    return LinearProbeTable.TABLE_SIZES[-1]
+
+
+def _layout(keys: list[str], full_hashes: list[int]) -> list[int|None]:
+    """
+    Linear probe the keys into a new table. Returns, for each slot, the
+    index of the key in it or None.
+
+    :complexity: O(N) plus probing, where N is the table size.
+    """
+    slots = [None] * _size_for(len(keys))
+    for index, full_hash in enumerate(full_hashes):
+        position = full_hash % len(slots)
+        while slots[position] is not None:
+            position = (position + 1) % len(slots)
+        slots[position] = index
+    return slots
+
+
+def dump(table, path: str) -> None:
+    """
+    Write a snapshot of a DoubleKeyTable with string keys to path.
+    Values must be picklable.
+
+    :complexity: O(N*L + M) where N is the number of pairs, L the length
+        of the longest key and M the size of the file.
+    :raises TypeError: if any key is not a string.
+    """
+    modulus = LinearProbeTable.FULL_HASH_MODULUS
+    base = table.HASH_BASE
+    buckets = [(key1, list(table.iter_items(key1))) for key1 in table.iter_keys()]
+    for key1, items in buckets:
+        if not isinstance(key1, str) or not all(isinstance(key2, str) for key2, _ in items):
+            raise TypeError("Only tables with string keys can be dumped.")
+
+    strings = bytearray()
+    string_offsets = {}
+
+    def add_string(key: str) -> tuple[int, int]:
+        if key not in string_offsets:
+            string_offsets[key] = len(strings)
+            strings.extend(key.encode("utf-8"))
+        return string_offsets[key], len(key.encode("utf-8"))
+
+    values = bytearray()
+    outer_keys = [key1 for key1, _ in buckets]
+    outer_hashes = hash_many(outer_keys, modulus, base)
+    outer = _layout(outer_keys, outer_hashes)
+    outer_offset = HEADER.size
+    inner_offset = outer_offset + OUTER_SLOT.size * len(outer)
+
+    outer_records = bytearray(OUTER_SLOT.size * len(outer))
+    inner_records = bytearray()
+    pairs = 0
+    for slot, index in enumerate(outer):
+        if index is None:
+            OUTER_SLOT.pack_into(outer_records, slot * OUTER_SLOT.size, EMPTY, 0, 0, 0, 0, 0)
+            continue
+        key1, items = buckets[index]
+        inner_keys = [key2 for key2, _ in items]
+        inner_hashes = hash_many(inner_keys, modulus, base)
+        inner = _layout(inner_keys, inner_hashes)
+        records = bytearray(INNER_SLOT.size * len(inner))
+        for inner_slot, item in enumerate(inner):
+            if item is None:
+                INNER_SLOT.pack_into(records, inner_slot * INNER_SLOT.size, EMPTY, 0, 0, 0, 0)
+                continue
+            key2, value = items[item]
+            value_bytes = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            INNER_SLOT.pack_into(records, inner_slot * INNER_SLOT.size,
+                                 inner_hashes[item], *add_string(key2), len(values), len(value_bytes))
+            values.extend(value_bytes)
+        OUTER_SLOT.pack_into(outer_records, slot * OUTER_SLOT.size, outer_hashes[index], *add_string(key1),
+                             inner_offset + len(inner_records), len(inner), len(items))
+        inner_records.extend(records)
+        pairs += len(items)
+
+    strings_offset = inner_offset + len(inner_records)
+    values_offset = strings_offset + len(strings)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(outer), len(buckets), pairs, base,
+                            outer_offset, strings_offset, values_offset))
+        f.write(outer_records)
+        f.write(inner_records)
+        f.write(strings)
+        f.write(values)
+
+
+class MappedDoubleKeyTable:
+    """
+    Read-only Double Hash Table served from a snapshot file written by dump.
+
+    Opening the file only reads its header. Each lookup hashes its keys
+    once, probes the mapped slots, and unpickles just the value found.
+    Can be used as a context manager, closing the mapping on exit.
+
+    Unless stated otherwise, all methods have O(1) complexity.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Map the snapshot at path.
+
+        :raises ValueError: if the file is not a snapshot this version can read.
+        """
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.table_size, self.count, self.pairs, self.hash_base,
+         self.outer_offset, self.strings_offset, self.values_offset) = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} table snapshot.")
+
+    def close(self) -> None:
+        self.map.close()
+
+    def __enter__(self) -> MappedDoubleKeyTable:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """
+        Returns number of top-level keys, as DoubleKeyTable does.
+        """
+        return self.count
+
+    def _string(self, offset: int, length: int) -> bytes:
+        start = self.strings_offset + offset
+        return self.map[start:start + length]
+
+    def _probe(self, key: str, offset: int, size: int, record: struct.Struct) -> tuple:
+        """
+        Linear probe the mapped table of `size` slots at offset for key.
+
+        :return: the key's slot record.
+        :complexity: O(hash(key) + N*comp(K)) where N is the probe length.
+        :raises KeyError: When the key is not in the table.
+        """
+        if not isinstance(key, str):
+            raise KeyError(key)
+        full_hash = polynomial_hash(key, LinearProbeTable.FULL_HASH_MODULUS, self.hash_base)
+        encoded = key.encode("utf-8")
+        position = full_hash % size
+        for _ in range(size):
+            slot = record.unpack_from(self.map, offset + position * record.size)
+            if slot[0] == EMPTY:
+                break
+            elif slot[0] == full_hash and slot[2] == len(encoded) and self._string(slot[1], slot[2]) == encoded:
+                return slot
+            position = (position + 1) % size
+        raise KeyError(key)
+
+    def _outer(self, key1: str) -> tuple:
+        return self._probe(key1, self.outer_offset, self.table_size, OUTER_SLOT)
+
+    def __getitem__(self, key: tuple[str, str]) -> V:
+        """
+        Get the value at a certain key
+
+        :complexity: O(hash(key1) + hash(key2) + probing + unpickling the value).
+        :raises KeyError: when the key doesn't exist.
+        """
+        outer = self._outer(key[0])
+        inner = self._probe(key[1], outer[3], outer[4], INNER_SLOT)
+        start = self.values_offset + inner[3]
+        return pickle.loads(self.map[start:start + inner[4]])
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        """
+        Checks to see if the given key is in the table, without unpickling its value.
+
+        :complexity: O(hash(key1) + hash(key2) + probing).
+        """
+        try:
+            outer = self._outer(key[0])
+            self._probe(key[1], outer[3], outer[4], INNER_SLOT)
+        except KeyError:
+            return False
+        return True
+
+    def iter_keys(self, key: str|None = None) -> Iterator[str]:
+        """
+        key = None:
+            Returns an iterator of all top-level keys in the table
+        key = k:
+            Returns an iterator of all keys in the bottom-level table for k.
+
+        :complexity: O(N) over the whole iteration, where N is the size of
+            the table walked.
+        :raises KeyError: when k is not in the table.
+        """
+        if key is None:
+            offset, size, record = self.outer_offset, self.table_size, OUTER_SLOT
+        else:
+            outer = self._outer(key)
+            offset, size, record = outer[3], outer[4], INNER_SLOT
+        for position in range(size):
+            slot = record.unpack_from(self.map, offset + position * record.size)
+            if slot[0] != EMPTY:
+                yield self._string(slot[1], slot[2]).decode("utf-8")
+
+    def keys(self, key: str|None = None) -> list[str]:
+        """
+        See iter_keys.
+        """
+        return list(self.iter_keys(key))
@@ -1,8 +1,15 @@
 from __future__ import annotations
 
-from typing import Generic, TypeVar, Iterator
+import json
+from time import perf_counter
+from typing import Generic, TypeVar, Iterable, Iterator
+from data_structures.hash_strategy import HashStrategy
 from data_structures.hash_table import LinearProbeTable, FullError
+from data_structures.memory_footprint import new_footprint, total, add_nested, shallow_size, array_size, deep_size
+from data_structures.probe_stats import ProbeStats, max_cluster
 from data_structures.referential_array import ArrayR
+from data_structures.small_table import SmallTable
+from double_key_snapshot import dump
 
 K1 = TypeVar('K1')
 K2 = TypeVar('K2')
@@ -19,6 +26,31 @@ class DoubleKeyTable(Generic[K1, K2, V]):
                 Otherwise `hash2` should be overwritten.
         - V:    Value Type.
 
+    Outer slots are (key1, internal table, full hash) triples. As in
+    LinearProbeTable the full hash of key1 is cached, so resizing the outer
+    table or repairing a cluster moves each internal table by reference,
+    without hashing key1 again or touching the internal table at all.
+
+    With `secondary_index=True` the table also keeps a reverse index from
+    each key2 to the key1s it appears under, making lookup_by_second and
+    delete_by_second O(1) in the size of the table rather than a scan of
+    every internal table. It costs an extra probe on every set and delete.
+
+    Given a `small_bucket_size`, each new key1 starts out with a SmallTable,
+    a plain list searched linearly, in place of an internal hash table. It
+    is swapped for a real one once it holds more than that many entries.
+    Most buckets of a few entries then cost one list rather than a table
+    and an ArrayR each. Positions in a SmallTable are
+    insertion order rather than hash2, so this is off by default.
+
+    Both keys are hashed by one HashStrategy, which the internal tables
+    share, so they need no hash function of their own. Assigning `hash1`
+    or `hash2` onto an instance still works, but internal tables made
+    before `hash2` is assigned keep using the strategy.
+
+    As with LinearProbeTable, `enable_stats` turns on recording of probes
+    and rehashes, here for the outer table and every internal table.
+
     Unless stated otherwise, all methods have O(1) complexity.
     """
 
@@ -27,97 +59,154 @@ class DoubleKeyTable(Generic[K1, K2, V]):
 
     HASH_BASE = 31
 
-    def __init__(self, sizes:list|None=None, internal_sizes:list|None=None) -> None:
+    # Internal tables start as SmallTables holding up to this many entries. 0 never does.
+    SMALL_BUCKET_SIZE = 0
+
+    # Gives the table-independent hashes of both keys. key1's is cached in every slot.
+    HASH_STRATEGY: HashStrategy = LinearProbeTable.HASH_STRATEGY
+
+    def __init__(self, sizes:list|None=None, internal_sizes:list|None=None,
+                 internal_table_type:type[LinearProbeTable]=LinearProbeTable,
+                 secondary_index:bool=False, small_bucket_size:int|None=None,
+                 hash_strategy:HashStrategy|None=None) -> None:
         #check if there are other Table sizes defined for the external table
         if sizes is not None:
             self.TABLE_SIZES = sizes
+        if hash_strategy is not None:
+            self.HASH_STRATEGY = hash_strategy
+        if small_bucket_size is not None:
+            self.SMALL_BUCKET_SIZE = small_bucket_size
 
         self.size_index = 0
         self.array = ArrayR(self.TABLE_SIZES[self.size_index])
         self.count = 0
         self.internal_sizes = internal_sizes
+        #class used for the internal tables, any LinearProbeTable subclass works
+        self.internal_table_type = internal_table_type
+        self.probe_stats: ProbeStats|None = None
+        #bumped whenever a pair is added or removed, so iterators can tell
+        self._version = 0
+        #key2 -> {key1: internal table holding (key1, key2)}, or None if not kept
+        self.secondary: LinearProbeTable[K2, dict[K1, LinearProbeTable[K2, V]]]|None = None
+        if secondary_index:
+            self.secondary = self._new_table(LinearProbeTable)
+
+    def _new_table(self, table_type: type[LinearProbeTable], sizes: list|None = None) -> LinearProbeTable:
+        """
+        Make an empty table keyed by K2, hashing its keys with hash2.
+        By default that is exactly the table's own hash with our strategy.
+        """
+        new_table = table_type(sizes, hash_strategy=self.HASH_STRATEGY)
+        if not self._hash2_is_default():
+            new_table.hash = lambda k: self.hash2(k, new_table)
+        return new_table
 
+    def full_hash1(self, key: K1) -> int:
+        """
+        Hash the 1st key independently of the current table size.
 
+        :complexity: See HASH_STRATEGY, O(len(key)) by default.
+        """
+        return self.HASH_STRATEGY.full_hash(key)
 
     def hash1(self, key: K1) -> int:
         """
         Hash the 1st key for insert/retrieve/update into the hashtable.
 
-        :complexity: O(len(key))
+        :complexity: See HASH_STRATEGY, O(len(key)) by default.
         """
+        return self.full_hash1(key) % self.table_size
 
-        value = 0
-        a = 31415
-        for char in key:
-            value = (ord(char) + a * value) % self.table_size
-            a = a * self.HASH_BASE % (self.table_size - 1)
-        return value
+    def _hash1_is_default(self) -> bool:
+        """
+        Whether outer positions can be taken straight from a cached full hash.
+        Not the case once `hash1` is overridden or assigned onto the instance.
+        """
+        return "hash1" not in self.__dict__ and type(self).hash1 is DoubleKeyTable.hash1
+
+    def _hash2_is_default(self) -> bool:
+        """
+        Whether internal tables can hash their keys with their own hash.
+        Not the case once `hash2` is overridden or assigned onto the instance.
+        """
+        return "hash2" not in self.__dict__ and type(self).hash2 is DoubleKeyTable.hash2
 
     def hash2(self, key: K2, sub_table: LinearProbeTable[K2, V]) -> int:
         """
         Hash the 2nd key for insert/retrieve/update into the hashtable.
 
-        :complexity: O(len(key))
+        :complexity: See HASH_STRATEGY, O(len(key)) by default.
         """
-
-        value = 0
-        a = 31415
-        for char in key:
-            value = (ord(char) + a * value) % sub_table.table_size
-            a = a * self.HASH_BASE % (sub_table.table_size - 1)
-        return value
+        return self.HASH_STRATEGY.full_hash(key) % sub_table.table_size
 
     def _linear_probe(self, key1: K1, key2: K2, is_insert: bool) -> tuple[int, int]:
         """
         Find the correct position for this key in the hash table using linear probing.
 
+        The outer table is probed for key1, and then the internal table
+        found there is probed for key2, so each level costs one probe.
+
+        :complexity: See _outer_probe, plus LinearProbeTable._linear_probe.
         :raises KeyError: When the key pair is not in the table, but is_insert is False.
         :raises FullError: When a table is full and cannot be inserted.
         """
+        position = self._outer_probe(key1, is_insert)
+        return (position, self.array[position][1]._linear_probe(key2, is_insert))
 
-        position = self.hash1(key1)
-
-        for _ in range(self.table_size):
+    def _outer_probe(self, key1: K1, is_insert: bool) -> int:
+        """
+        Find the position of key1 in the outer table using linear probing.
+        When inserting a new key1 an empty internal table is placed there.
+
+        :complexity best: O(hash1(key1)) first position is empty or key1.
+        :complexity worst: O(hash1(key1) + N*comp(K1)) when we've searched
+            the entire table, where N is the table size.
+        :raises KeyError: When key1 is not in the table, but is_insert is False.
+        :raises FullError: When the outer table is full and cannot be inserted.
+        """
+        if self._hash1_is_default():
+            full_hash = self.full_hash1(key1)
+            position = full_hash % self.table_size
+        else:
+            position = self.hash1(key1)
+            # The cached hash is still compared, so it must match entries
+            # placed before hash1 was overridden. An overridden hash1 may
+            # take keys full_hash1 cannot, which cache None instead.
+            try:
+                full_hash = self.full_hash1(key1)
+            except (TypeError, AttributeError):
+                full_hash = None
+
+        for probes in range(1, self.table_size + 1):
             #if a position is empty
             if self.array[position] is None:
+                if self.probe_stats is not None:
+                    self.probe_stats.record_probe(False, probes)
                 #if you are looking for an index to insert at
                 if is_insert:
                     #make a new internal hash table so there is a place with the given internal table specs
-                    new_table = LinearProbeTable(self.internal_sizes)
-                    #change the hash method to be hash2 from this class instead of the default for linprob object
-                    new_table.hash = lambda k: self.hash2(k, new_table)
+                    if self.SMALL_BUCKET_SIZE > 0:
+                        new_table = SmallTable()
+                    else:
+                        new_table = self._new_table(self.internal_table_type, self.internal_sizes)
+                    if self.probe_stats is not None:
+                        new_table.enable_stats()
                     #place in empty index with external key
-                    self.array[position] = (key1, new_table)
+                    self.array[position] = (key1, new_table, full_hash)
                     self.count += 1
-                    #get the internal position in the new table
-                    internal = self.array[position][1].hash(key2)
-                    return (position, internal)
+                    return position
                 else:
                     raise KeyError(key1)
             #if its not none, then a tuple is stored
-            elif self.array[position][0] == key1:
-                #get the internal hash table
-                table = self.array[position][1]
-                #if you are not inserting
-                if not is_insert:
-                    table_info = table.array
-                else:
-                    table[key2] = key2
-                    table_info = table.array
-                    
-                #get underlying array data
-                #check for where key is placed
-                for i in range(len(table_info)):
-                    if table_info[i] is not None:
-                        if table_info[i][0] == key2:
-                            if is_insert:
-                                del table[key2]
-                            return (position, i)
-                #if key is not there, then wrong key was input
-                raise KeyError(key2)
+            elif self.array[position][2] == full_hash and self.array[position][0] == key1:
+                if self.probe_stats is not None:
+                    self.probe_stats.record_probe(True, probes)
+                return position
             else:
                 position = (position + 1) % self.table_size
 
+        if self.probe_stats is not None:
+            self.probe_stats.record_probe(False, self.table_size)
         if is_insert:
             raise FullError("The outer table is full!")
         else:
@@ -125,45 +214,70 @@ class DoubleKeyTable(Generic[K1, K2, V]):
 
 
 
+    def _check_version(self, version: int) -> None:
+        """
+        :raises RuntimeError: if pairs were added or removed since version.
+        """
+        if self._version != version:
+            raise RuntimeError("DoubleKeyTable changed size during iteration")
+
+    def iter_items(self, key:K1|None=None) -> Iterator[tuple[tuple[K1, K2], V]|tuple[K2, V]]:
+        """
+        key = None:
+            Returns an iterator of all ((key1, key2), value) pairs in the table.
+        key = k:
+            Returns an iterator of all (key2, value) pairs in the bottom-hash-table for k.
+
+        Slots are read straight out of the tables as the iterator goes, so
+        no lists are built along the way.
+
+        :complexity: O(1) extra memory. O(N + M) over the whole iteration,
+            where N is the table size and M the total size of the internal tables.
+        :raises KeyError: when k is not in the table.
+        :raises RuntimeError: when a pair is added or removed during the iteration.
+        """
+        version = self._version
+        if key is None:
+            for entry in self.array:
+                if entry is not None:
+                    for key2, value in entry[1].iter_items():
+                        yield (entry[0], key2), value
+                        self._check_version(version)
+        else:
+            position = self._outer_probe(key, False)
+            for item in self.array[position][1].iter_items():
+                yield item
+                self._check_version(version)
+
     def iter_keys(self, key:K1|None=None) -> Iterator[K1|K2]:
         """
         key = None:
             Returns an iterator of all top-level keys in hash table
         key = k:
             Returns an iterator of all keys in the bottom-hash-table for k.
+
+        :complexity: See iter_items.
+        :raises KeyError: when k is not in the table.
+        :raises RuntimeError: when a pair is added or removed during the iteration.
         """
+        version = self._version
         if key is None:
             for entry in self.array:
                 if entry is not None:
                     yield entry[0]
+                    self._check_version(version)
         else:
-            position = self.hash1(key)
-            for _ in range(self.table_size):
-                if self.array[position] is not None and self.array[position][0] == key:
-                    for sub_key in self.array[position][1].keys():
-                        yield sub_key
-                    return
-                position = (position + 1) % self.table_size
-            raise KeyError(f"Key {key} not found")
+            for key2, _ in self.iter_items(key):
+                yield key2
 
     def keys(self, key:K1|None=None) -> list[K1|K2]:
         """
         key = None: returns all top-level keys in the table.
         key = x: returns all bottom-level keys for top-level key x.
+
+        :raises KeyError: when x is not in the table.
         """
-        if key is None:
-            res = []
-            for x in range(self.table_size):
-                if self.array[x] is not None:
-                    res.append(self.array[x][0])
-            return res
-        
-        position = self.hash1(key)
-        for i in range(self.table_size):
-            if self.array[i] is not None:
-                if self.array[i][0] is key:
-                    return self.array[1].keys()
-            position = (position+1) % self.table_size
+        return list(self.iter_keys(key))
 
     def iter_values(self, key:K1|None=None) -> Iterator[V]:
         """
@@ -171,40 +285,22 @@ class DoubleKeyTable(Generic[K1, K2, V]):
             Returns an iterator of all values in hash table
         key = k:
             Returns an iterator of all values in the bottom-hash-table for k.
+
+        :complexity: See iter_items.
+        :raises KeyError: when k is not in the table.
+        :raises RuntimeError: when a pair is added or removed during the iteration.
         """
-        if key is None:
-            for entry in self.array:
-                if entry is not None:
-                    for value in entry[1].values():
-                        yield value
-        else:
-            position = self.hash1(key)
-            for _ in range(self.table_size):
-                if self.array[position] is not None and self.array[position][0] == key:
-                    for value in self.array[position][1].values():
-                        yield value
-                    return
-                position = (position + 1) % self.table_size
-            raise KeyError(f"Key {key} not found")
+        for _, value in self.iter_items(key):
+            yield value
 
     def values(self, key:K1|None=None) -> list[V]:
         """
         key = None: returns all values in the table.
         key = x: returns all values for top-level key x.
+
+        :raises KeyError: when x is not in the table.
         """
-        if key is None:
-            res = []
-            for x in range(self.table_size):
-                if self.array[x] is not None:
-                    res.append(self.array[x][1].values())
-            return res
-        
-        position = self.hash1(key)
-        for _ in range(self.table_size):
-            if self.array[position] is not None:
-                if self.array[position][0] is key:
-                    return self.array[position].values()
-            position = (position+1) % self.table_size
+        return list(self.iter_values(key))
 
     def __contains__(self, key: tuple[K1, K2]) -> bool:
         """
@@ -223,84 +319,277 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         """
         Get the value at a certain key
 
+        :complexity: See _outer_probe, plus LinearProbeTable.__getitem__.
         :raises KeyError: when the key doesn't exist.
         """
-        position = self._linear_probe(key[0], key[1], False)
-        table = self.array[position][1]
-        value = table[key[1]]
-        return value
+        position = self._outer_probe(key[0], False)
+        return self.array[position][1][key[1]]
 
 
     def __setitem__(self, key: tuple[K1, K2], data: V) -> None:
         """
         Set an (key, value) pair in our hash table.
-        """
 
-        position = self._linear_probe(key[0], key[1], True)
+        :complexity: See _outer_probe, plus LinearProbeTable.__setitem__.
+        """
 
-        self.array[position[0]][1][key[1]] = data
+        position = self._outer_probe(key[0], True)
+        self._set_at(position, key[0], key[1], data)
 
         if len(self) > self.table_size / 2:
             self._rehash()
 
+    def _set_at(self, position: int, key1: K1, key2: K2, data: V) -> None:
+        """
+        Set a pair whose key1 is at position, which stays put. The outer
+        table is not resized.
+
+        :complexity: See LinearProbeTable.__setitem__.
+        """
+        table = self.array[position][1]
+        before = len(table)
+
+        table[key2] = data
+        if len(table) != before:
+            self._bump_version()
+
+        if self.secondary is not None:
+            self._index_set(key1, key2, table)
+
+        if isinstance(table, SmallTable) and len(table) > self.SMALL_BUCKET_SIZE:
+            self._promote(position)
+
     def __delitem__(self, key: tuple[K1, K2]) -> None:
         """
         Deletes a (key, value) pair in our hash table.
 
+        Once the internal table is empty its outer slot is cleared, and the
+        rest of the cluster is moved back by reference using the cached hashes.
+
+        :complexity: See _outer_probe, plus LinearProbeTable.__delitem__,
+            plus O(N) in the length of the rest of the cluster.
         :raises KeyError: when the key doesn't exist.
         """
-        position = self._linear_probe(key[0], key[1], False)
+        position = self._outer_probe(key[0], False)
+        self._delete_at(position, key[0], key[1])
+        if len(self.array[position][1]) == 0:
+            self._remove_outer(position)
+
+    def _delete_at(self, position: int, key1: K1, key2: K2) -> None:
+        """
+        Delete a pair whose key1 is at position, even if that empties its
+        internal table.
+
+        :complexity: See LinearProbeTable.__delitem__.
+        :raises KeyError: when key2 is not in the internal table.
+        """
         # Remove the element
-        del self.array[position[0]][1][key[1]]
-
-        if len(self.array[position[0]][1]) == 0:
-            self.array[position[0]] = None
-            self.count -= 1
-            # Start moving over the cluster
-            pos = (position[0] + 1) % self.table_size
-            #while stuff need to shift
-            while self.array[pos] is not None:
-                #get the outer key and the inner table
-                value_key, inner_table = self.array[pos]
-                #erase the position
-                self.array[pos] = None
-                #get any key from the sub table for the lin probe
-                inner_key_value = inner_table.keys()[0]
-
-                # Reinsert.
-                #find the new place
-                newpos = self._linear_probe(value_key, inner_key_value, True)
-                #replace the linearprobed place with the correct information
-                self.array[newpos[0]] = (value_key, inner_table)
-                #keep on trucking
-                position = (pos + 1) % self.table_size
+        del self.array[position][1][key2]
+        self._bump_version()
+
+        if self.secondary is not None:
+            self._index_delete(key1, key2)
+
+    def _bump_version(self) -> None:
+        """
+        Note that pairs were added or removed, invalidating live iterators.
+        """
+        self._version += 1
+
+    def _index_set(self, key1: K1, key2: K2, table: LinearProbeTable[K2, V]) -> None:
+        """
+        Record in the secondary index that key2 is under key1, in table.
+        """
+        try:
+            self.secondary[key2][key1] = table
+        except KeyError:
+            self.secondary[key2] = {key1: table}
+
+    def _index_delete(self, key1: K1, key2: K2) -> None:
+        """
+        Remove key2 under key1 from the secondary index.
+        """
+        owners = self.secondary[key2]
+        del owners[key1]
+        if len(owners) == 0:
+            del self.secondary[key2]
+
+    def _remove_outer(self, position: int) -> None:
+        """
+        Clear the outer slot at position, moving the rest of its cluster back.
+
+        :complexity: O(N) in the length of the rest of the cluster.
+        """
+        self.array[position] = None
+        self.count -= 1
+        # Start moving over the cluster
+        position = (position + 1) % self.table_size
+        while self.array[position] is not None:
+            item = self.array[position]
+            self.array[position] = None
+            # Reinsert the same entry, internal table and all.
+            self._place(item)
+            position = (position + 1) % self.table_size
+
+    @staticmethod
+    def _group_by_first(keys: Iterable[tuple[K1, K2]]) -> dict[K1, list[tuple[int, K2]]]:
+        """
+        Group (key1, key2) pairs by key1, keeping each key2's place in the input.
+
+        :complexity: O(N) where N is the number of pairs.
+        """
+        groups = {}
+        for index, (key1, key2) in enumerate(keys):
+            groups.setdefault(key1, []).append((index, key2))
+        return groups
+
+    def get_many(self, keys: Iterable[tuple[K1, K2]]) -> list[V]:
+        """
+        Get the values of many (key1, key2) pairs, in the order given.
+        Pairs are grouped by key1, and each key1 is only probed once.
+
+        :complexity: O(N) plus one _outer_probe per distinct key1 and one
+            internal lookup per pair, where N is the number of pairs.
+        :raises KeyError: when any of the pairs doesn't exist.
+        """
+        keys = list(keys)
+        res = [None] * len(keys)
+        for key1, group in self._group_by_first(keys).items():
+            table = self.array[self._outer_probe(key1, False)][1]
+            for index, key2 in group:
+                res[index] = table[key2]
+        return res
+
+    def set_many(self, items: Iterable[tuple[tuple[K1, K2], V]]) -> None:
+        """
+        Set many ((key1, key2), value) pairs. As with repeated __setitem__,
+        a later value for the same pair wins.
+        Pairs are grouped by key1, and each key1 is only probed once.
+
+        :complexity: O(N) plus one _outer_probe per distinct key1 and one
+            internal insert per pair, where N is the number of pairs.
+        """
+        items = list(items)
+        for key1, group in self._group_by_first(key for key, _ in items).items():
+            position = self._outer_probe(key1, True)
+            for index, key2 in group:
+                self._set_at(position, key1, key2, items[index][1])
+            if len(self) > self.table_size / 2:
+                self._rehash()
+
+    def delete_many(self, keys: Iterable[tuple[K1, K2]]) -> None:
+        """
+        Delete many (key1, key2) pairs.
+        Pairs are grouped by key1, and each key1 is only probed once.
+
+        :complexity: O(N) plus one _outer_probe per distinct key1 and one
+            internal delete per pair, where N is the number of pairs.
+        :raises KeyError: when any of the pairs doesn't exist. Pairs
+            grouped before it have already been deleted.
+        """
+        for key1, group in self._group_by_first(keys).items():
+            position = self._outer_probe(key1, False)
+            try:
+                for _, key2 in group:
+                    self._delete_at(position, key1, key2)
+            finally:
+                if len(self.array[position][1]) == 0:
+                    self._remove_outer(position)
+
+    def _promote(self, position: int) -> LinearProbeTable[K2, V]:
+        """
+        Replace the SmallTable at position with an internal hash table
+        holding the same entries, in the same order.
+
+        :complexity: O(N) where N is SMALL_BUCKET_SIZE, plus hashing the keys.
+        """
+        key1, small, full_hash = self.array[position]
+        table = self._new_table(self.internal_table_type, self.internal_sizes)
+        if small.probe_stats is not None:
+            table.enable_stats()
+        table.update_many(small.iter_items())
+        self.array[position] = (key1, table, full_hash)
+        if self.secondary is not None:
+            for key2 in small.keys():
+                self._index_set(key1, key2, table)
+        return table
+
+    def lookup_by_second(self, key2: K2) -> list[tuple[K1, V]]:
+        """
+        Find every (key1, value) pair stored under key2, whatever key1 is.
+
+        :complexity: O(hash2(key2) + M) with the secondary index, where M is
+            the number of pairs found, plus a probe of each of their internal
+            tables. Without it, O(N) internal table lookups where N is the
+            table size.
+        :raises KeyError: when key2 is not in the table.
+        """
+        if self.secondary is not None:
+            return [(key1, table[key2]) for key1, table in self.secondary[key2].items()]
+        res = []
+        for entry in self.array:
+            if entry is not None and key2 in entry[1]:
+                res.append((entry[0], entry[1][key2]))
+        if len(res) == 0:
+            raise KeyError(key2)
+        return res
+
+    def delete_by_second(self, key2: K2) -> None:
+        """
+        Delete every pair stored under key2, whatever key1 is.
+
+        :complexity: See lookup_by_second, plus a delete per pair found.
+        :raises KeyError: when key2 is not in the table.
+        """
+        for key1, _ in self.lookup_by_second(key2):
+            del self[key1, key2]
+
+    def _place(self, item: tuple[K1, LinearProbeTable[K2, V], int|None]) -> None:
+        """
+        Put an outer entry into the first free slot from its home position.
+        The key is already known not to be in the table, so is never compared.
+
+        :pre: The outer table is not full.
+        :complexity: O(N) where N is the length of the cluster at its home.
+        """
+        if self._hash1_is_default():
+            position = item[2] % self.table_size
+        else:
+            position = self.hash1(item[0])
+        while self.array[position] is not None:
+            position = (position + 1) % self.table_size
+        self.array[position] = item
 
     def _rehash(self) -> None:
         """
         Need to resize table and reinsert all values
 
-        :complexity best: O(N*hash(K)) No probing.
-        :complexity worst: O(N*hash(K) + N^2*comp(K)) Lots of probing.
+        Each entry is moved, internal table and all, to the first free slot
+        from its cached full hash reduced to the new size.
+
+        :complexity best: O(N) No probing.
+        :complexity worst: O(N^2) Lots of probing.
         Where N is len(self)
         """
         old_array = self.array
         self.size_index += 1
-        if self.size_index == len(self.TABLE_SIZES):
+        if self.size_index >= len(self.TABLE_SIZES):
             # Cannot be resized further.
             return
+        start = perf_counter()
         self.array = ArrayR(self.TABLE_SIZES[self.size_index])
-        self.count = 0
         for item in old_array:
             if item is not None:
-                key, value = item
-                self[key] = value
+                self._place(item)
+        if self.probe_stats is not None:
+            self.probe_stats.record_rehash(perf_counter() - start)
 
     @property
     def table_size(self) -> int:
         """
         Return the current size of the table (different from the length)
         """
-        return self.TABLE_SIZES[self.size_index]
+        return len(self.array)
 
     def __len__(self) -> int:
         """
@@ -308,6 +597,108 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         """
         return self.count
 
+    def _internal_tables(self) -> Iterator[LinearProbeTable[K2, V]]:
+        for entry in self.array:
+            if entry is not None:
+                yield entry[1]
+
+    def enable_stats(self) -> None:
+        """
+        Start recording probes and rehashes, from zero, in the outer table
+        and every internal table, including those made later.
+
+        :complexity: O(N) where N is the table size.
+        """
+        self.probe_stats = ProbeStats()
+        for table in self._internal_tables():
+            table.enable_stats()
+
+    def disable_stats(self) -> None:
+        """
+        Stop recording everywhere, discarding anything recorded so far.
+
+        :complexity: O(N) where N is the table size.
+        """
+        self.probe_stats = None
+        for table in self._internal_tables():
+            table.disable_stats()
+
+    def stats(self) -> dict:
+        """
+        Report on the outer table as LinearProbeTable.stats does, with the
+        internal tables summed up under "internal": their number, total
+        count, longest cluster and combined probe and rehash counters.
+        Everything can be passed straight to json.dumps.
+
+        :complexity: O(N + M) where N is the table size and M the total
+            size of the internal tables.
+        """
+        res = {
+            "table_size": self.table_size,
+            "count": len(self),
+            "load_factor": len(self) / self.table_size,
+            "max_cluster": max_cluster(entry is not None for entry in self.array),
+        }
+        res.update((self.probe_stats or ProbeStats()).to_dict())
+
+        tables = count = longest = 0
+        internal = ProbeStats()
+        for table in self._internal_tables():
+            tables += 1
+            count += len(table)
+            table_stats = table.stats()
+            longest = max(longest, table_stats["max_cluster"])
+            if table.probe_stats is not None:
+                internal.merge(table.probe_stats)
+        res["internal"] = {"tables": tables, "count": count, "max_cluster": longest}
+        res["internal"].update(internal.to_dict())
+        return res
+
+    def stats_json(self, **kwargs) -> str:
+        """
+        stats() as JSON. Keyword arguments are passed on to json.dumps.
+
+        :complexity: See stats.
+        """
+        return json.dumps(self.stats(), **kwargs)
+
+    def memory_footprint(self, seen: set[int]|None = None) -> dict[str, int]:
+        """
+        Bytes used by the table, broken down as in
+        LinearProbeTable.memory_footprint. The outer slots and their tuples
+        are "slots" and "entries", and everything else the internal tables
+        and the secondary index allocate is "nested". Keys and values
+        include those of every internal table.
+
+        :complexity: O(N + M + O) where N is the table size, M the total
+            size of the internal tables, and O the number of objects
+            reachable from the keys and values.
+        """
+        seen = set() if seen is None else seen
+        res = new_footprint()
+        res["table"] = shallow_size(self, seen) + shallow_size(vars(self), seen) + deep_size(self.probe_stats, seen)
+        res["slots"] = array_size(self.array, seen)
+        for entry in self.array:
+            if entry is not None:
+                res["entries"] += shallow_size(entry, seen)
+                res["keys"] += deep_size(entry[0], seen)
+                add_nested(res, entry[1].memory_footprint(seen))
+        if self.secondary is not None:
+            # Its keys and internal tables have all been counted above.
+            res["nested"] += self.secondary.memory_footprint(seen)["total"]
+        return total(res)
+
+    def dump(self, path: str) -> None:
+        """
+        Write the table to a snapshot file, which double_key_snapshot's
+        MappedDoubleKeyTable serves straight from an mmap.
+        Keys must be strings and values picklable.
+
+        :complexity: See double_key_snapshot.dump.
+        :raises TypeError: if any key is not a string.
+        """
+        dump(self, path)
+
     def __str__(self) -> str:
         """
         String representation.
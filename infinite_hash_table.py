@@ -1,7 +1,10 @@
 from __future__ import annotations
-from typing import Generic, TypeVar
+from heapq import heappop, heappush
+from itertools import count
+from typing import Generic, Iterator, TypeVar
 
-from data_structures.referential_array import ArrayR
+from data_structures.memory_footprint import new_footprint, total, shallow_size, array_size, deep_size
+from data_structures.referential_array import ArrayR, SparseArrayR
 
 K = TypeVar("K")
 V = TypeVar("V")
@@ -15,13 +18,35 @@ class InfiniteHashTable(Generic[K, V]):
                 Otherwise `hash` should be overwritten.
         - V:    Value Type.
 
+    A lower level is stored as (label, table), where the label is a prefix
+    shared by every key below it. Characters colliding in the hash share a
+    slot, so when a key with a different character joins a lower level its
+    label is cut back to the prefix they do share.
+
+    Lower levels are mostly empty, so with `sparse_levels=True` they keep
+    their slots in a SparseArrayR, which only allocates the slots in use.
+    That roughly halves the memory of the lower levels, but each slot read
+    costs a popcount, so lookups are slower. Positions and get_location
+    are the same either way.
+
     Unless stated otherwise, all methods have O(1) complexity.
     """
 
     TABLE_SIZE = 27
+    SPARSE_LEVELS = False
 
-    def __init__(self, daddy_table: InfiniteHashTable|None = None) -> None:
-        self.array:ArrayR[tuple[K,V|InfiniteHashTable]] = ArrayR(self.TABLE_SIZE)
+    def __init__(self, daddy_table: InfiniteHashTable|None = None, sparse_levels: bool|None = None) -> None:
+        """
+        Make a table one level below daddy_table, or a top-level table
+        whose lower levels are sparse if sparse_levels is True, by default
+        SPARSE_LEVELS. Lower levels follow the top level's choice.
+        """
+        if sparse_levels is not None and sparse_levels != self.SPARSE_LEVELS:
+            self.SPARSE_LEVELS = sparse_levels
+        if daddy_table is not None and (daddy_table.SPARSE_LEVELS or isinstance(daddy_table.array, SparseArrayR)):
+            self.array:ArrayR[tuple[K,V|InfiniteHashTable]] = SparseArrayR(self.TABLE_SIZE)
+        else:
+            self.array = ArrayR(self.TABLE_SIZE)
         self.count = 0
         if daddy_table is None:
             self.level = 0
@@ -41,71 +66,138 @@ class InfiniteHashTable(Generic[K, V]):
         """
         Get the value at a certain key
 
+        :complexity: O(D) where D is the depth of the key.
         :raises KeyError: when the key doesn't exist.
         """
-        position = self.get_location(key)
-
-        if len(position) == 1:
-            element = self.array[position[0]]
-            if element is None:
+        table = self
+        while True:
+            entry = table.array[table.hash(key)]
+            if entry is None:
+                raise KeyError(key)
+            elif isinstance(entry[1], InfiniteHashTable):
+                table = entry[1]
+            elif entry[0] == key:
+                return entry[1]
+            else:
                 raise KeyError(key)
-            return element[1]
-        else:
-            return self.array[position[0]][1].__getitem__(key)
-        
 
     def __setitem__(self, key: K, value: V) -> None:
         """
         Set an (key, value) pair in our hash table.
+
+        When the key's slot holds another key, both move down into a new
+        table one level lower, repeated until they reach different slots.
+
+        :complexity: O(D) where D is the depth of the key afterwards.
+        :raises ValueError: when key and a key in the table hash alike at
+            every level, so cannot be told apart.
         """
-        position = self.get_location(key)
-        local_pos = position[0]
-        key_match = key == self.array[local_pos][0]
+        table = self
+        # Tables whose count goes up if the key is new.
+        path = []
+        while True:
+            path.append(table)
+            position = table.hash(key)
+            entry = table.array[position]
+            if entry is None:
+                table.array[position] = (key, value)
+                break
+            elif isinstance(entry[1], InfiniteHashTable):
+                if not key.startswith(entry[0]):
+                    table.array[position] = (self._common_prefix(entry[0], key), entry[1])
+                table = entry[1]
+            elif entry[0] == key:
+                table.array[position] = (key, value)
+                return
+            else:
+                self._split(table, position, (key, value))
+                break
+        for table in path:
+            table.count += 1
+
+    @staticmethod
+    def _common_prefix(key: str, other: str) -> str:
+        """
+        The longest prefix of both key and other.
 
-        if len(position) !=  1:
-            self.array[local_pos][1].__setitem__(key, value)
-        
-        elif self.array[local_pos] is None or key_match:
-            self.array[local_pos] = (key, value)
-            if not key_match:
-                self.count +=1
-        
-        else:
-            pair_1 = (key, value)
-            pair_2 = self.array[local_pos]
-            new_table = InfiniteHashTable(daddy_table=self)
-            new_key = key[0:self.level+1]
-            self.array[local_pos] = (new_key, new_table)
-            self.array[local_pos][1].__setitem__(pair_2[0], pair_2[1])
-            self.array[local_pos][1].__setitem__(pair_1[0], pair_1[1])
+        :complexity: O(L) where L is the length of that prefix.
+        """
+        length = 0
+        for char, other_char in zip(key, other):
+            if char != other_char:
+                break
+            length += 1
+        return key[0:length]
+
+    @staticmethod
+    def _split(table: InfiniteHashTable, position: int, item: tuple[K, V]) -> None:
+        """
+        Replace the pair at position in table by a chain of new tables,
+        deep enough that it and item land in different slots.
 
-            
+        :complexity: O(L) where L is the length of the chain.
+        :raises ValueError: when the keys hash alike at every level, so
+            cannot be told apart. The table is left unchanged.
+        """
+        other = table.array[position]
+        top, top_position = table, position
+        prefix = InfiniteHashTable._common_prefix(item[0], other[0])
+        while True:
+            if table.level >= max(len(item[0]), len(other[0])):
+                top.array[top_position] = other
+                raise ValueError(f"{item[0]!r} and {other[0]!r} hash alike at every level.")
+            new_table = type(table)(daddy_table=table)
+            new_table.count = 2
+            table.array[position] = (prefix[0:table.level+1], new_table)
+            table = new_table
+            position = table.hash(item[0])
+            other_position = table.hash(other[0])
+            if position != other_position:
+                table.array[position] = item
+                table.array[other_position] = other
+                return
 
     def __delitem__(self, key: K) -> None:
         """
         Deletes a (key, value) pair in our hash table.
 
+        A table left holding a single pair is replaced by the pair in its
+        parent, repeated up towards the top level.
+
+        :complexity: O(D*T) where D is the depth of the key and T the TABLE_SIZE.
         :raises KeyError: when the key doesn't exist.
         """
-        position = self.get_location(key)
-        local_pos = position[0]
-
-        if len(position) == 1:
-            if self.array[local_pos] is None:
+        table = self
+        # (table, position) for every level above the key.
+        path = []
+        while True:
+            position = table.hash(key)
+            entry = table.array[position]
+            if entry is None:
+                raise KeyError(key)
+            elif isinstance(entry[1], InfiniteHashTable):
+                path.append((table, position))
+                table = entry[1]
+            elif entry[0] == key:
+                break
+            else:
                 raise KeyError(key)
-            self.array[local_pos] = None
-            self.count -= 1
-
-        else:
-            self.array[local_pos][1].__delitem__(key)
-            
-            if len(self.array[local_pos][1]) == 1 and len(self.array[local_pos][1].values()) > 0:
-                remaining_key = self.array[local_pos][1].keys()[0]
-                remaining_value = self.array[local_pos][1].__getitem__(remaining_key)
-                self.array[local_pos] = (remaining_key, remaining_value)
 
+        table.array[position] = None
+        table.count -= 1
+        for parent, _ in path:
+            parent.count -= 1
+        for parent, position in reversed(path):
+            if table.count != 1:
+                break
+            # Lower tables have already been collapsed, so this is a pair.
+            parent.array[position] = next(entry for entry in table.array if entry is not None)
+            table = parent
 
     def __len__(self) -> int:
+        """
+        Returns the number of keys in the table, including all lower levels.
+        """
         return self.count
 
     def __str__(self) -> str:
@@ -120,22 +212,29 @@ class InfiniteHashTable(Generic[K, V]):
         """
         Get the sequence of positions required to access this key.
 
+        :complexity: O(D) where D is the depth of the key.
         :raises KeyError: when the key doesn't exist.
         """
-        position = self.hash(key)
-
-        if self.array[position] is None or not isinstance(self.array[position][1], InfiniteHashTable):
-            return [position]
-        else:
-            lower_position = self.array[position][1].get_location(key)
-            return [position]+lower_position
-
+        table = self
+        res = []
+        while True:
+            position = table.hash(key)
+            entry = table.array[position]
+            res.append(position)
+            if entry is None:
+                raise KeyError(key)
+            elif isinstance(entry[1], InfiniteHashTable):
+                table = entry[1]
+            elif entry[0] == key:
+                return res
+            else:
+                raise KeyError(key)
 
     def __contains__(self, key: K) -> bool:
         """
         Checks to see if the given key is in the Hash Table
 
-        :complexity: See linear probe.
+        :complexity: See __getitem__.
         """
         try:
             _ = self[key]
@@ -164,14 +263,174 @@ class InfiniteHashTable(Generic[K, V]):
     def sort_keys(self) -> list[str]:
         """
         Returns all keys currently in the table in lexicographically sorted order.
+
+        :complexity: O(L*T log T) where L is the number of tables, T the TABLE_SIZE.
         """
-        res = []
+        return list(self.iter_sorted_keys())
+
+    def iter_sorted_keys(self) -> Iterator[K]:
+        """
+        Yield the keys in lexicographically sorted order. A table is only
+        opened once its label is the smallest thing left to yield.
+
+        :complexity: O(T log N) per table visited and O(log N) per key,
+            where T is the TABLE_SIZE and N the number of keys.
+        """
+        return self._sorted_keys_between(None, None)
 
-        for i in self.array:
-            if i is not None:
-                if isinstance(i[1],InfiniteHashTable):
-                    res.append(i[0])
-                else:
-                    res = res + i[1].sort_keys()
+    def keys_with_prefix(self, prefix: str) -> Iterator[K]:
+        """
+        Yield the keys starting with prefix in sorted order, only descending
+        into the slots that prefix hashes to.
+
+        :complexity: O(P + S) where P is the length of prefix and S the cost
+            of iter_sorted_keys on the table holding the matches.
+        """
+        # Characters of prefix pick the slots, as keys' characters do.
+        table = self
+        while table.level < len(prefix):
+            entry = table.array[table.hash(prefix)]
+            if entry is None:
+                return
+            elif isinstance(entry[1], InfiniteHashTable):
+                table = entry[1]
+            else:
+                if entry[0].startswith(prefix):
+                    yield entry[0]
+                return
+        yield from table._sorted_keys_between(None, None, prefix)
+
+    def keys_in_range(self, lo: str, hi: str) -> Iterator[K]:
+        """
+        Yield the keys with lo <= key < hi in sorted order. Tables whose
+        label puts every key below them under lo are skipped, and the walk
+        stops at the first label or key from hi on.
+
+        :complexity: See iter_sorted_keys, for the tables visited.
+        """
+        return self._sorted_keys_between(lo, hi)
+
+    def _sorted_keys_between(self, lo: str|None, hi: str|None, prefix: str = "") -> Iterator[K]:
+        """
+        Yield the keys with lo <= key < hi starting with prefix in sorted
+        order, with None leaving that side unbounded.
+
+        Keys and tables wait in a heap under their key or label, which is
+        never more than any key below the table, so the smallest key left
+        is always yielded next, even when colliding characters mix keys
+        with different prefixes in one table.
+        """
+        # Ties are broken by insertion order, so tables are never compared.
+        order = count()
+        heap = [("", next(order), self)]
+        while heap:
+            bound, _, item = heappop(heap)
+            if hi is not None and bound >= hi:
+                return
+            if not isinstance(item, InfiniteHashTable):
+                yield item
+                continue
+            for label, value in filter(None, item.array):
+                if isinstance(value, InfiniteHashTable):
+                    # Every key below starts with label.
+                    if lo is not None and label < lo[:len(label)]:
+                        continue
+                    if not (label.startswith(prefix) or prefix.startswith(label)):
+                        continue
+                    heappush(heap, (label, next(order), value))
+                elif (lo is None or label >= lo) and label.startswith(prefix):
+                    heappush(heap, (label, next(order), label))
+
+    def rank(self, key: K) -> int:
+        """
+        The position of key in sort_keys: the number of keys before it.
+        A table whose label sorts before the same length of key is counted
+        whole, one sorting after it is skipped, and only tables whose label
+        key starts with are looked into.
+
+        :complexity: O(D*T) where D is the depth of the key and T the
+            TABLE_SIZE, plus the tables whose label was cut back by a
+            collision to a prefix of key.
+        :raises KeyError: when the key doesn't exist.
+        """
+        if key not in self:
+            raise KeyError(key)
+        res = 0
+        tables = [self]
+        while tables:
+            table = tables.pop()
+            for label, value in filter(None, table.array):
+                if not isinstance(value, InfiniteHashTable):
+                    if label < key:
+                        res += 1
+                elif label < key[:len(label)]:
+                    # Every key below starts with label, so comes first.
+                    res += value.count
+                elif key.startswith(label):
+                    tables.append(value)
         return res
 
+    def select(self, index: int) -> K:
+        """
+        The key at index in sort_keys. Walks in sorted order as
+        iter_sorted_keys does, but a table whose keys all come before
+        everything else still waiting is skipped by its count, or else
+        holds the key, so everything else is dropped.
+
+        :complexity: O(D*T log T) where D is the depth of the key and T the
+            TABLE_SIZE, when no collision mixes keys with different prefixes.
+        :raises IndexError: when index is out of range.
+        """
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        # As in _sorted_keys_between.
+        order = count()
+        heap = [("", next(order), self)]
+        while True:
+            bound, _, item = heappop(heap)
+            if not isinstance(item, InfiniteHashTable):
+                if index == 0:
+                    return item
+                index -= 1
+                continue
+            if not heap or bound < heap[0][0][:len(bound)]:
+                if index >= item.count:
+                    index -= item.count
+                    continue
+                heap.clear()
+            for label, value in filter(None, item.array):
+                heappush(heap, (label, next(order), value if isinstance(value, InfiniteHashTable) else label))
+
+    def memory_footprint(self, seen: set[int]|None = None) -> dict[str, int]:
+        """
+        Bytes used by the table, broken down as in
+        LinearProbeTable.memory_footprint. This level's object, array and
+        tuples are "table", "slots" and "entries", and everything the lower
+        levels allocate is "nested". Keys include the prefixes which label
+        the lower levels. See LinearProbeTable.memory_footprint for `seen`.
+
+        :complexity: O(L*T + M) where L is the number of levels, T the
+            TABLE_SIZE and M the number of objects reachable from the keys
+            and values.
+        """
+        seen = set() if seen is None else seen
+        res = new_footprint()
+        tables = [self]
+        while tables:
+            table = tables.pop()
+            storage = shallow_size(table, seen) + shallow_size(vars(table), seen)
+            slots = array_size(table.array, seen)
+            entries = 0
+            for entry in table.array:
+                if entry is not None:
+                    entries += shallow_size(entry, seen)
+                    res["keys"] += deep_size(entry[0], seen)
+                    if isinstance(entry[1], InfiniteHashTable):
+                        tables.append(entry[1])
+                    else:
+                        res["values"] += deep_size(entry[1], seen)
+            if table is self:
+                res["table"], res["slots"], res["entries"] = storage, slots, entries
+            else:
+                res["nested"] += storage + slots + entries
+        return total(res)
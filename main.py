@@ -17,6 +17,7 @@ from trail import Trail, TrailSeries, TrailSplit
 from draw_trails import TrailDraw
 from mountain_organiser import MountainOrganiser
 from double_key_table import DoubleKeyTable
+from data_structures.hash_strategy import BuiltinHash
 from serialize import serialize, deserialize
 
 class MyWindow(arcade.Window):
@@ -282,8 +283,7 @@ class MyWindow(arcade.Window):
             t = deserialize(json.loads(f.read()))
         try:
             # Try to add all existing mountains
-            for mountain in t.collect_all_mountains():
-                self.mountain_manager.add_mountain(mountain)
+            self.mountain_manager.add_mountains(t.collect_all_mountains())
         except NotImplementedError:
             pass
         self.mountain = TrailDraw(t)
@@ -391,8 +391,8 @@ class MyWindow(arcade.Window):
             ]
         groups = self.mountain_manager.group_by_difficulty()
         to = MountainOrganiser()
-        positions = DoubleKeyTable()
-        positions.hash1 = lambda k: (k % positions.table_size)
+        # Keyed by difficulty, which BuiltinHash places at k % table_size.
+        positions = DoubleKeyTable(hash_strategy=BuiltinHash())
         all_mountains = []
         for i, group in enumerate(groups):
             to.add_mountains(group)
@@ -1,31 +1,73 @@
 from __future__ import annotations
 from mountain import Mountain
 
+from contextlib import nullcontext
+
 from double_key_table import DoubleKeyTable
+from concurrent_double_key_table import ConcurrentDoubleKeyTable
+from data_structures.compact_hash_table import CompactLinearProbeTable
 
 class MountainManager:
 
-    def __init__(self) -> None:
-        self.mountains = DoubleKeyTable()
+    def __init__(self, thread_safe: bool = False) -> None:
+        # Compact internal tables keep mountains of each difficulty in the
+        # order they were added, so listings (and the GUI graph) are stable.
+        # The secondary index finds mountains by name alone, and difficulties
+        # with only a few mountains keep them in a SmallTable.
+        # thread_safe lets several threads add and edit mountains at once.
+        table_type = ConcurrentDoubleKeyTable if thread_safe else DoubleKeyTable
+        self.mountains = table_type(internal_table_type=CompactLinearProbeTable, secondary_index=True,
+                                    small_bucket_size=8)
 
     def add_mountain(self, mountain: Mountain) -> None:
         key = (str(mountain.difficulty_level), mountain.name)
         self.mountains[key] = mountain
 
+    def add_mountains(self, mountains: list[Mountain]) -> None:
+        """
+        Add many mountains, probing each difficulty once.
+        """
+        self.mountains.set_many(((str(mountain.difficulty_level), mountain.name), mountain) for mountain in mountains)
+
     def remove_mountain(self, mountain: Mountain) -> None:
         key = (str(mountain.difficulty_level), mountain.name)
         del self.mountains[key]
 
+    def find_mountain(self, name: str) -> Mountain:
+        """
+        Find a mountain by name, without knowing its difficulty.
+
+        :raises KeyError: when there is no mountain with that name.
+        """
+        return self.mountains.lookup_by_second(name)[0][1]
+
     def edit_mountain(self, old: Mountain, new: Mountain) -> None:
-        self.remove_mountain(old)
-        self.add_mountain(new)
+        # The GUI edits mountains in place, so what is stored may already be
+        # `new`, under old's difficulty. Find it by name rather than trusting
+        # old.difficulty_level.
+        with self._locked():
+            for difficulty, mountain in self.mountains.lookup_by_second(old.name):
+                if mountain is new or mountain == old:
+                    del self.mountains[difficulty, old.name]
+                    break
+            else:
+                raise KeyError(old.name)
+            self.add_mountain(new)
+
+    def _locked(self):
+        """
+        Keep other threads out for the duration, if the manager is thread safe.
+        """
+        if isinstance(self.mountains, ConcurrentDoubleKeyTable):
+            return self.mountains.locked()
+        return nullcontext()
 
     def mountains_with_difficulty(self, diff: int) -> list[Mountain]:
-        diff_mounts = self.mountains.keys(str(diff))
-        res = []
-        for value in diff_mounts:
-            res.append(self.mountains[(str(diff), value)])
-        return res
+        # One probe for the difficulty, then straight through its table.
+        try:
+            return self.mountains.values(str(diff))
+        except KeyError:
+            return []
                 
 
 
@@ -9,10 +9,7 @@ class MountainOrganiser:
         self.mountains = InfiniteHashTable()
 
     def cur_position(self, mountain: Mountain) -> int:
-        keys = self.mountains.sort_keys()
-        for i in range(len(keys)):
-            if keys[i] == mountain.name:
-                return i
+        return self.mountains.rank(mountain.name)
 
     def add_mountains(self, mountains: list[Mountain]) -> None:
         for mountain in mountains:
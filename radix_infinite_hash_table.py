@@ -0,0 +1,172 @@
+from __future__ import annotations
+from typing import TypeVar
+
+from infinite_hash_table import InfiniteHashTable
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class RadixInfiniteHashTable(InfiniteHashTable[K, V]):
+    """
+    Path-compressed Infinite Hash Table.
+
+    A table's level is the position of the character it branches on, which
+    need not be one more than its parent's. Where keys share a run of
+    characters, a single entry (prefix, table) skips straight to the level
+    they diverge at, instead of a chain of tables with one entry each. The
+    tables in a branch are then bounded by the number of places keys
+    diverge, however long the keys are. For example mount-everest-north
+    and mount-everest-south share one table, branching at level 14.
+
+    Every table but the top-level one holds at least two entries, and a
+    table emptied down to one by a delete is replaced by that entry.
+
+    Slots are found with the same hash as InfiniteHashTable, so a key's
+    get_location is its InfiniteHashTable location with the levels that
+    only had one entry left out. Lookups and sort_keys work unchanged.
+
+    Unless stated otherwise, all methods have O(1) complexity.
+    """
+
+    def __init__(self, daddy_table: InfiniteHashTable|None = None, level: int|None = None,
+                 sparse_levels: bool|None = None) -> None:
+        """
+        Make a table branching on the character at level, by default one
+        more than its parent's. See InfiniteHashTable for sparse_levels.
+        """
+        super().__init__(daddy_table, sparse_levels)
+        if level is not None:
+            self.level = level
+
+    def _hash_at(self, key: K, level: int) -> int:
+        """
+        The position of key in a table of the given level.
+        """
+        if level < len(key):
+            return ord(key[level]) % (self.TABLE_SIZE-1)
+        return self.TABLE_SIZE-1
+
+    def hash(self, key: K) -> int:
+        return self._hash_at(key, self.level)
+
+    def _divergence(self, key: K, other: K, start: int, stop: int|None = None) -> int|None:
+        """
+        The first level from start (up to stop) at which the keys hash to
+        different positions, or None if there is none before stop.
+
+        :complexity: O(L) where L is the number of levels compared.
+        :raises ValueError: when stop is None and the keys never hash apart.
+        """
+        level = start
+        while stop is None or level < stop:
+            if self._hash_at(key, level) != self._hash_at(other, level):
+                return level
+            elif stop is None and level >= max(len(key), len(other)):
+                raise ValueError(f"{key!r} and {other!r} hash alike at every level.")
+            level += 1
+        return None
+
+    @staticmethod
+    def _any_key(table: InfiniteHashTable) -> K:
+        """
+        Some key stored in or below table.
+
+        :complexity: O(D*T) where D is the number of tables below table
+            on the way, and T the TABLE_SIZE.
+        """
+        while True:
+            entry = next(entry for entry in table.array if entry is not None)
+            if not isinstance(entry[1], InfiniteHashTable):
+                return entry[0]
+            table = entry[1]
+
+    def __setitem__(self, key: K, value: V) -> None:
+        """
+        Set an (key, value) pair in our hash table.
+
+        Meeting another key, or a prefix the key does not follow all the
+        way, inserts one table at the level where they diverge.
+
+        :complexity: O(D + L) where D is the number of tables above the key
+            and L its length.
+        :raises ValueError: when key and a key in the table hash alike at
+            every level, so cannot be told apart.
+        """
+        table = self
+        # Tables whose count goes up if the key is new.
+        path = []
+        while True:
+            path.append(table)
+            position = table.hash(key)
+            entry = table.array[position]
+            if entry is None:
+                table.array[position] = (key, value)
+                break
+            elif isinstance(entry[1], InfiniteHashTable):
+                # A label cut back by a collision no longer spells out the
+                # positions the edge skips, but any key below it does.
+                if len(entry[0]) >= entry[1].level:
+                    other = entry[0]
+                else:
+                    other = self._any_key(entry[1])
+                level = self._divergence(key, other, table.level + 1, entry[1].level)
+                if level is None:
+                    if not key.startswith(entry[0]):
+                        table.array[position] = (self._common_prefix(entry[0], key), entry[1])
+                    table = entry[1]
+                    continue
+                new_table = type(self)(table, level)
+                new_table.count = entry[1].count + 1
+            elif entry[0] == key:
+                table.array[position] = (key, value)
+                return
+            else:
+                other = entry[0]
+                level = self._divergence(key, other, table.level + 1)
+                new_table = type(self)(table, level)
+                new_table.count = 2
+            new_table.array[new_table.hash(other)] = entry
+            new_table.array[new_table.hash(key)] = (key, value)
+            table.array[position] = (self._common_prefix(entry[0], key)[0:level], new_table)
+            break
+        for table in path:
+            table.count += 1
+
+    def __delitem__(self, key: K) -> None:
+        """
+        Deletes a (key, value) pair in our hash table.
+
+        A table left with a single entry is replaced by it in its parent.
+        Its parent still has as many entries as before, so nothing further
+        up changes.
+
+        :complexity: O(D + T) where D is the number of tables above the key
+            and T the TABLE_SIZE.
+        :raises KeyError: when the key doesn't exist.
+        """
+        table = self
+        # (table, position) for every level above the key.
+        path = []
+        while True:
+            position = table.hash(key)
+            entry = table.array[position]
+            if entry is None:
+                raise KeyError(key)
+            elif isinstance(entry[1], InfiniteHashTable):
+                path.append((table, position))
+                table = entry[1]
+            elif entry[0] == key:
+                break
+            else:
+                raise KeyError(key)
+
+        table.array[position] = None
+        table.count -= 1
+        for parent, _ in path:
+            parent.count -= 1
+        if path:
+            remaining = [entry for entry in table.array if entry is not None]
+            if len(remaining) == 1:
+                parent, position = path[-1]
+                parent.array[position] = remaining[0]
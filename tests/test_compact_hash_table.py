@@ -0,0 +1,78 @@
+import unittest
+from ed_utils.decorators import number
+
+from data_structures.compact_hash_table import CompactLinearProbeTable
+from data_structures.hash_table import LinearProbeTable
+from double_key_table import DoubleKeyTable
+
+
+class TestCompactHashTable(unittest.TestCase):
+
+    @number("10.1")
+    def test_insertion_order(self):
+        ct = CompactLinearProbeTable()
+        names = [f"mountain-{i}" for i in range(50, 0, -1)]
+        for i, name in enumerate(names):
+            ct[name] = i
+        self.assertEqual(ct.keys(), names)
+        self.assertEqual(ct.values(), list(range(50)))
+
+        # Updates keep their place, deletes leave a hole until the next rebuild.
+        ct["mountain-50"] = "first"
+        del ct["mountain-25"]
+        del ct["mountain-10"]
+        expected = [name for name in names if name not in ("mountain-25", "mountain-10")]
+        self.assertEqual(ct.keys(), expected)
+        self.assertEqual(ct.values()[0], "first")
+        self.assertEqual(ct.used, 50)
+        self.assertEqual(len(ct), 48)
+        ct["mountain-10"] = "last"
+        self.assertEqual(ct.keys(), expected + ["mountain-10"])
+        self.assertEqual(str(ct).splitlines()[-1], "(mountain-10,last)")
+
+        ct._compact()
+        self.assertEqual(ct.used, 49)
+        self.assertEqual(ct.keys(), expected + ["mountain-10"])
+
+    @number("10.2")
+    def test_matches_linear_probe(self):
+        for tombstones in (False, True):
+            lp = LinearProbeTable(tombstones=tombstones)
+            ct = CompactLinearProbeTable(tombstones=tombstones)
+            reference = {}
+            for i in range(3000):
+                key = f"k{i % 250}-{i % 9}"
+                if key in reference and i % 3 == 0:
+                    del lp[key]
+                    del ct[key]
+                    del reference[key]
+                else:
+                    lp[key] = i
+                    ct[key] = i
+                    reference[key] = i
+            self.assertEqual(ct.keys(), list(reference))
+            self.assertEqual(ct.values(), list(reference.values()))
+            self.assertEqual(ct.table_size, lp.table_size)
+            for key in reference:
+                self.assertEqual(ct.array[ct._linear_probe(key, False)][0], key)
+                self.assertEqual(ct[key], reference[key])
+            self.assertEqual(ct.get_many(list(reference)), list(reference.values()))
+            self.assertNotIn("missing", ct)
+
+    @number("10.3")
+    def test_internal_tables(self):
+        # Same positions as the example in test_double_hash, with compact internal tables.
+        dt = DoubleKeyTable(sizes=[12], internal_sizes=[5], internal_table_type=CompactLinearProbeTable)
+        dt.hash1 = lambda k: ord(k[0]) % 12
+        dt.hash2 = lambda k, sub_table: ord(k[-1]) % 5
+
+        dt["Amy", "Ben"] = 2
+        dt["May", "Ben"] = 3
+        dt["May", "Tom"] = 5
+        self.assertEqual(dt._linear_probe("May", "Jim", True), (6, 1))
+        dt["May", "Jim"] = 7
+        self.assertEqual(dt._linear_probe("May", "Jim", False), (6, 1))
+        self.assertEqual(dt.array[6][1]["Tom"], 5)
+        del dt["May", "Ben"]
+        self.assertEqual(dt._linear_probe("May", "Jim", False), (6, 0))
+        self.assertEqual(dt.array[6][1].keys(), ["Tom", "Jim"])
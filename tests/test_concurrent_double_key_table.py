@@ -0,0 +1,70 @@
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from ed_utils.decorators import number
+
+from concurrent_double_key_table import ConcurrentDoubleKeyTable
+from double_key_table import DoubleKeyTable
+from mountain import Mountain
+from mountain_manager import MountainManager
+
+
+def workload(table: DoubleKeyTable, worker: int) -> None:
+    """
+    Each worker owns its own key2s, spread over key1s shared with the others,
+    and adds, overwrites, reads back and deletes them.
+    """
+    for i in range(600):
+        key = (f"d{i % 23}", f"w{worker}-m{i}")
+        table[key] = i
+        if i % 3 == 0:
+            table[key] = -i
+        if table[key] != (-i if i % 3 == 0 else i):
+            raise AssertionError(key)
+        if i % 5 == 0:
+            del table[key]
+
+
+class TestConcurrentDoubleKeyTable(unittest.TestCase):
+
+    @number("12.1")
+    def test_stress_matches_serial(self):
+        workers = 8
+        serial = DoubleKeyTable(secondary_index=True, small_bucket_size=4)
+        for worker in range(workers):
+            workload(serial, worker)
+
+        table = ConcurrentDoubleKeyTable(stripes=4, secondary_index=True, small_bucket_size=4)
+        # Switch threads as often as possible, to give races a chance.
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for future in [pool.submit(workload, table, worker) for worker in range(workers)]:
+                    future.result()
+        finally:
+            sys.setswitchinterval(interval)
+
+        self.assertEqual(len(table), len(serial))
+        # No version bumps were lost between stripes.
+        self.assertEqual(table._version, serial._version)
+        self.assertEqual(dict(table.iter_items()), dict(serial.iter_items()))
+        for key1 in serial.keys():
+            self.assertEqual(set(table.keys(key1)), set(serial.keys(key1)))
+        self.assertEqual(table.lookup_by_second("w3-m7"), serial.lookup_by_second("w3-m7"))
+        self.assertRaises(KeyError, lambda: table.lookup_by_second("w3-m5"))
+
+    @number("12.2")
+    def test_manager(self):
+        mm = MountainManager(thread_safe=True)
+        mountains = [Mountain(f"m{i}", i % 6, i) for i in range(300)]
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            list(pool.map(mm.add_mountain, mountains))
+            list(pool.map(lambda m: mm.edit_mountain(m, Mountain(m.name, m.difficulty_level + 10, m.length)),
+                          mountains[::2]))
+        # Every mountain of difficulty 0 has an even index, so was edited.
+        self.assertEqual(len(mm.mountains_with_difficulty(0)), 0)
+        self.assertEqual(len(mm.mountains_with_difficulty(10)), 50)
+        self.assertEqual(len(mm.mountains_with_difficulty(1)), 50)
+        self.assertEqual(mm.find_mountain("m4").difficulty_level, 14)
+        self.assertEqual(mm.find_mountain("m5").difficulty_level, 5)
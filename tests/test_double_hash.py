@@ -1,7 +1,11 @@
+import json
+import sys
 import unittest
 from ed_utils.decorators import number
 
 from double_key_table import DoubleKeyTable
+from data_structures.hash_table import LinearProbeTable
+from data_structures.small_table import SmallTable
 
 class TestDoubleHash(unittest.TestCase):
 
@@ -123,4 +127,233 @@ class TestDoubleHash(unittest.TestCase):
         # We just want to make sure you aren't returning a list and are doing this
         # with an iterator.
         self.assertRaises(BaseException, lambda: next(key_iterator))
-        self.assertRaises(BaseException, lambda: next(value_iterator))
\ No newline at end of file
+        self.assertRaises(BaseException, lambda: next(value_iterator))
+
+    @number("3.6")
+    def test_stats(self):
+        dt = DoubleKeyTable(sizes=[12], internal_sizes=[5])
+        dt.hash1 = lambda k: ord(k[0]) % 12
+        dt.hash2 = lambda k, sub_table: ord(k[-1]) % 5
+        dt["Tim", "Jen"] = 1
+        dt.enable_stats()
+        dt["Tim", "Bob"] = 2
+        dt["May", "Ben"] = 3
+        dt["Het", "Liz"] = 4
+
+        stats = dt.stats()
+        # "Tim" is found first time, "May" goes straight into an empty
+        # slot and "Het" probes past "Tim".
+        self.assertEqual(stats["hits"], [0, 1])
+        self.assertEqual(stats["misses"], [0, 1, 1])
+        self.assertEqual(stats["count"], 3)
+        self.assertEqual(stats["internal"]["tables"], 3)
+        self.assertEqual(stats["internal"]["count"], 4)
+        self.assertEqual(json.loads(dt.stats_json()), stats)
+
+    @number("3.7")
+    def test_probe_does_not_touch_internal_table(self):
+        dt = DoubleKeyTable(sizes=[12], internal_sizes=[5])
+        dt.hash1 = lambda k: ord(k[0]) % 12
+        dt.hash2 = lambda k, sub_table: ord(k[-1]) % 5
+        dt["May", "Ben"] = 3
+        dt["May", "Tom"] = 5
+        inner = dt.array[5][1]
+        inner.enable_stats()
+
+        self.assertEqual(dt._linear_probe("May", "Jim", True), (5, 1))
+        # Found by a single probe, with nothing inserted or deleted on the way.
+        self.assertEqual(len(inner), 2)
+        self.assertEqual(sorted(inner.keys()), ["Ben", "Tom"])
+        self.assertEqual(inner.stats()["misses"], [0, 0, 0, 1])
+
+        self.assertEqual(dt["May", "Tom"], 5)
+        self.assertRaises(KeyError, lambda: dt["May", "Jim"])
+        self.assertRaises(KeyError, lambda: dt["Kim", "Jim"])
+
+    @number("3.8")
+    def test_resize_moves_internal_tables(self):
+        dt = DoubleKeyTable()
+        for i in range(200):
+            dt[f"peak-{i}", "a"] = i
+            dt[f"peak-{i}", "b"] = -i
+        # Each internal table is the same object all the way through.
+        tables = {key: dt.array[dt._outer_probe(key, False)][1] for key in dt.keys()}
+        for i in range(0, 200, 2):
+            del dt[f"peak-{i}", "a"]
+            del dt[f"peak-{i}", "b"]
+        for i in range(200, 400):
+            dt[f"peak-{i}", "a"] = i
+
+        self.assertEqual(len(dt), 300)
+        for i in range(1, 200, 2):
+            key = f"peak-{i}"
+            self.assertIs(dt.array[dt._outer_probe(key, False)][1], tables[key])
+            self.assertEqual(dt[key, "b"], -i)
+        for i in range(0, 200, 2):
+            self.assertNotIn((f"peak-{i}", "a"), dt)
+        for i in range(200, 400):
+            self.assertEqual(dt[f"peak-{i}", "a"], i)
+
+    @number("3.9")
+    def test_secondary_index(self):
+        for indexed in (True, False):
+            dt = DoubleKeyTable(secondary_index=indexed)
+            for difficulty in range(20):
+                for i in range(difficulty, 30, 3):
+                    dt[f"d{difficulty}", f"m{i}"] = (difficulty, i)
+
+            self.assertEqual(sorted(dt.lookup_by_second("m4")), [("d1", (1, 4)), ("d4", (4, 4))])
+            self.assertRaises(KeyError, lambda: dt.lookup_by_second("m99"))
+
+            del dt["d1", "m4"]
+            self.assertEqual(dt.lookup_by_second("m4"), [("d4", (4, 4))])
+            dt["d7", "m4"] = "new"
+            self.assertEqual(sorted(dt.lookup_by_second("m4")), [("d4", (4, 4)), ("d7", "new")])
+
+            dt.delete_by_second("m4")
+            self.assertRaises(KeyError, lambda: dt.lookup_by_second("m4"))
+            self.assertNotIn(("d4", "m4"), dt)
+            self.assertNotIn(("d7", "m4"), dt)
+            self.assertRaises(KeyError, lambda: dt.delete_by_second("m4"))
+            self.assertEqual(dt["d4", "m7"], (4, 7))
+            if indexed:
+                self.assertNotIn("m4", dt.secondary)
+
+    @number("3.10")
+    def test_small_buckets(self):
+        dt = DoubleKeyTable(small_bucket_size=2, secondary_index=True)
+        dt["May", "Ben"] = 1
+        dt["May", "Tom"] = 2
+        small = dt.array[dt._outer_probe("May", False)][1]
+        self.assertIsInstance(small, SmallTable)
+        # Positions in a SmallTable are insertion order.
+        self.assertEqual(dt._linear_probe("May", "Tom", False)[1], 1)
+        self.assertEqual(dt._linear_probe("May", "Jim", True)[1], 2)
+        dt["May", "Ben"] = 3
+        self.assertEqual(small.keys(), ["Ben", "Tom"])
+
+        # Past the threshold it becomes a real table, keeping every entry.
+        dt["May", "Jim"] = 4
+        table = dt.array[dt._outer_probe("May", False)][1]
+        self.assertIsInstance(table, LinearProbeTable)
+        self.assertEqual({key: dt["May", key] for key in ("Ben", "Tom", "Jim")},
+                         {"Ben": 3, "Tom": 2, "Jim": 4})
+        self.assertEqual(dt.lookup_by_second("Ben"), [("May", 3)])
+        self.assertIs(dt.secondary["Tom"]["May"], table)
+
+        for i in range(100):
+            dt[f"k{i}", "a"] = i
+        del dt["k3", "a"]
+        self.assertNotIn(("k3", "a"), dt)
+        self.assertEqual(len(dt), 100)
+        self.assertEqual(dt["k99", "a"], 99)
+        self.assertEqual(DoubleKeyTable().SMALL_BUCKET_SIZE, 0)
+
+    @number("3.11")
+    def test_iter_items(self):
+        for small_bucket_size in (0, 2):
+            dt = DoubleKeyTable(small_bucket_size=small_bucket_size)
+            expected = {}
+            for i in range(50):
+                for j in range(i % 4 + 1):
+                    dt[f"d{i}", f"m{j}"] = i * j
+                    expected[f"d{i}", f"m{j}"] = i * j
+            self.assertEqual(dict(dt.iter_items()), expected)
+            self.assertEqual(dict(dt.iter_items("d7")), {"m0": 0, "m1": 7, "m2": 14, "m3": 21})
+            self.assertEqual(sorted(dt.values()), sorted(expected.values()))
+            self.assertEqual(set(dt.keys("d5")), {"m0", "m1"})
+            self.assertRaises(KeyError, lambda: dt.keys("d99"))
+            self.assertRaises(KeyError, lambda: next(dt.iter_items("d99")))
+
+            # Overwriting values is fine, adding or removing pairs is not.
+            iterator = dt.iter_items()
+            (key1, key2), _ = next(iterator)
+            dt[key1, key2] = "changed"
+            next(iterator)
+            dt["d1", "new"] = 1
+            self.assertRaises(RuntimeError, lambda: next(iterator))
+            iterator = dt.iter_keys()
+            next(iterator)
+            del dt["d1", "new"]
+            self.assertRaises(RuntimeError, lambda: next(iterator))
+
+    @number("3.12")
+    def test_batch(self):
+        for small_bucket_size in (0, 2):
+            dt = DoubleKeyTable(small_bucket_size=small_bucket_size, secondary_index=True)
+            dt.enable_stats()
+            pairs = [((f"d{i % 7}", f"m{i}"), i) for i in range(100)]
+            dt.set_many(pairs)
+            # Only one outer probe for each of the 7 difficulties.
+            self.assertEqual(sum(dt.stats()["misses"]) + sum(dt.stats()["hits"]), 7)
+            self.assertEqual(len(dt), 7)
+
+            keys = [key for key, _ in reversed(pairs)]
+            self.assertEqual(dt.get_many(keys), list(range(99, -1, -1)))
+            self.assertRaises(KeyError, lambda: dt.get_many([("d0", "m0"), ("d0", "m1")]))
+
+            dt.set_many([(("d0", "m0"), "a"), (("d9", "m0"), "b"), (("d0", "m0"), "c")])
+            self.assertEqual(dt.get_many([("d0", "m0"), ("d9", "m0")]), ["c", "b"])
+
+            dt.delete_many(key for key, _ in pairs if key[0] != "d3" and key != ("d0", "m0"))
+            self.assertEqual(sorted(dt.keys()), ["d0", "d3", "d9"])
+            self.assertEqual(dt.keys("d0"), ["m0"])
+            self.assertEqual(sorted(dt.lookup_by_second("m0")), [("d0", "c"), ("d9", "b")])
+            self.assertEqual(dt.lookup_by_second("m3"), [("d3", 3)])
+            self.assertRaises(KeyError, lambda: dt.lookup_by_second("m1"))
+            self.assertRaises(KeyError, lambda: dt.delete_many([("d3", "m1")]))
+
+    @number("3.13")
+    def test_memory_footprint(self):
+        footprints = []
+        for small_bucket_size in (0, 8):
+            dt = DoubleKeyTable(small_bucket_size=small_bucket_size)
+            for i in range(300):
+                dt[f"d{i % 100}", f"m{i}"] = i
+            footprint = dt.memory_footprint()
+            self.assertEqual(footprint["total"], sum(v for k, v in footprint.items() if k != "total"))
+            keys = sum(sys.getsizeof(f"d{i}") for i in range(100)) + sum(sys.getsizeof(f"m{i}") for i in range(300))
+            self.assertEqual(footprint["keys"], keys)
+            self.assertEqual(footprint["values"], sum(sys.getsizeof(i) for i in range(300)))
+            footprints.append(footprint)
+        # Small buckets of 3 cost less than full internal tables.
+        self.assertLess(footprints[1]["nested"], footprints[0]["nested"])
+
+        # The secondary index only adds nested storage.
+        dt = DoubleKeyTable(secondary_index=True)
+        for i in range(300):
+            dt[f"d{i % 100}", f"m{i}"] = i
+        footprint = dt.memory_footprint()
+        self.assertEqual((footprint["keys"], footprint["values"]), (footprints[0]["keys"], footprints[0]["values"]))
+        self.assertGreater(footprint["nested"], footprints[0]["nested"])
+
+    @number("3.14")
+    def test_override_hash1_after_insert(self):
+        dt = DoubleKeyTable(sizes=[12], internal_sizes=[5])
+        dt["Tim", "Jen"] = 1
+        dt["May", "Ben"] = 2
+        # Same positions as before, but no longer the default hash1.
+        dt.hash1 = lambda k: DoubleKeyTable.hash1(dt, k)
+        self.assertEqual((dt["Tim", "Jen"], dt["May", "Ben"]), (1, 2))
+        dt["Tim", "Bob"] = 3
+        self.assertEqual(len(dt), 2)
+        self.assertEqual(sorted(dt.keys("Tim")), ["Bob", "Jen"])
+        del dt["May", "Ben"]
+        self.assertNotIn(("May", "Ben"), dt)
+
+        dt = DoubleKeyTable(sizes=[12], internal_sizes=[5])
+        dt.hash1 = lambda k: k % 12
+        dt[5, "Jen"] = 1
+        self.assertEqual(dt[5, "Jen"], 1)
+
+    @number("3.15")
+    def test_int_keys_with_overridden_hash2(self):
+        for small_bucket_size in (0, 4):
+            dt = DoubleKeyTable(small_bucket_size=small_bucket_size)
+            dt.hash2 = lambda k, sub_table: k % sub_table.table_size
+            dt["a", 5] = 1
+            for i in range(30):
+                dt["a", i] = i
+            self.assertEqual([dt["a", i] for i in range(30)], list(range(30)))
+            del dt["a", 5]
+            self.assertNotIn(("a", 5), dt)
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from ed_utils.decorators import number
+
+from double_key_snapshot import MappedDoubleKeyTable
+from double_key_table import DoubleKeyTable
+from mountain import Mountain
+
+
+class TestDoubleKeySnapshot(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".dkt")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    @number("13.1")
+    def test_round_trip(self):
+        dt = DoubleKeyTable(small_bucket_size=2)
+        for i in range(300):
+            dt[str(i % 17), f"mount-{i}"] = Mountain(f"mount-{i}", i % 17, i)
+        dt["héhé", "ümlaut"] = [1, 2]
+        dt["7", ""] = None
+        dt.dump(self.path)
+
+        with MappedDoubleKeyTable(self.path) as mapped:
+            self.assertEqual(len(mapped), len(dt))
+            self.assertEqual(sorted(mapped.iter_keys()), sorted(dt.keys()))
+            for key1 in dt.keys():
+                self.assertEqual(sorted(mapped.iter_keys(key1)), sorted(dt.keys(key1)))
+            for (key1, key2), value in dt.iter_items():
+                self.assertIn((key1, key2), mapped)
+                self.assertEqual(mapped[key1, key2], value)
+            self.assertIsNone(mapped["7", ""])
+            self.assertEqual(mapped["héhé", "ümlaut"], [1, 2])
+
+            self.assertNotIn(("3", "mount-4"), mapped)
+            self.assertNotIn(("99", "mount-4"), mapped)
+            self.assertRaises(KeyError, lambda: mapped["3", "mount-4"])
+            self.assertRaises(KeyError, lambda: mapped[3, "mount-3"])
+            self.assertRaises(KeyError, lambda: mapped.keys("99"))
+
+    @number("13.2")
+    def test_invalid(self):
+        dt = DoubleKeyTable()
+        dt.hash1 = lambda k: k % dt.table_size
+        dt[3, "a"] = 1
+        self.assertRaises(TypeError, lambda: dt.dump(self.path))
+
+        with open(self.path, "wb") as f:
+            f.write(b"not a snapshot" * 10)
+        self.assertRaises(ValueError, lambda: MappedDoubleKeyTable(self.path))
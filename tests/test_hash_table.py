@@ -0,0 +1,388 @@
+import json
+import sys
+import unittest
+from unittest.mock import patch
+from ed_utils.decorators import number
+
+from data_structures import string_hash
+from data_structures.hash_strategy import BuiltinHash, FNV1aHash, PolynomialHash, FULL_HASH_LIMIT
+from data_structures.hash_table import LinearProbeTable
+from data_structures.string_hash import polynomial_hash, hash_many
+from double_key_table import DoubleKeyTable
+from data_structures.compact_hash_table import CompactLinearProbeTable
+from data_structures.parallel_hash_table import ParallelLinearProbeTable
+from data_structures.robin_hood_table import RobinHoodTable
+
+
+class CountingTable(LinearProbeTable):
+    """Linear probe table that counts how often keys are hashed."""
+
+    def __init__(self, sizes=None) -> None:
+        self.hash_calls = 0
+        super().__init__(sizes)
+
+    def full_hash(self, key) -> int:
+        self.hash_calls += 1
+        return super().full_hash(key)
+
+
+class TestLinearProbeTable(unittest.TestCase):
+
+    @number("8.1")
+    def test_cached_hash(self):
+        lp = CountingTable()
+        names = [f"mount-everest-{i}" for i in range(100)]
+        for name in names:
+            lp[name] = len(name)
+        # One hash per insert, none spent on the rehashes along the way.
+        self.assertEqual(lp.hash_calls, len(names))
+        self.assertGreater(lp.size_index, 0)
+
+        for name in names:
+            self.assertEqual(lp[name], len(name))
+            position = lp._linear_probe(name, False)
+            self.assertEqual(lp.array[position][2] % lp.table_size, lp.hash(name))
+
+    @number("8.2")
+    def test_overridden_hash(self):
+        # Positions must still follow a hash assigned onto the instance.
+        lp = LinearProbeTable(sizes=[5, 13])
+        lp.hash = lambda k: ord(k[0]) % lp.table_size
+
+        lp["aa"] = 1
+        lp["fa"] = 2
+        self.assertEqual(lp._linear_probe("aa", False), 2)
+        self.assertEqual(lp._linear_probe("fa", False), 3)
+
+        lp["ka"] = 3
+        # Resized to 13: 'a' -> 6, 'f' -> 11, 'k' -> 3
+        self.assertEqual(lp.table_size, 13)
+        self.assertEqual(lp._linear_probe("aa", False), 6)
+        self.assertEqual(lp._linear_probe("fa", False), 11)
+        self.assertEqual(lp._linear_probe("ka", False), 3)
+
+        del lp["aa"]
+        self.assertNotIn("aa", lp)
+        self.assertEqual(lp["fa"], 2)
+
+    @number("8.3")
+    def test_tombstones(self):
+        lp = LinearProbeTable(sizes=[13], tombstones=True, tombstone_limit=0.2)
+        lp.hash = lambda k: ord(k[0]) % lp.table_size
+
+        lp["aa"] = 1
+        lp["ab"] = 2
+        lp["ac"] = 3
+        self.assertEqual(lp._linear_probe("ac", False), 8)
+
+        del lp["ab"]
+        # Left in place, lookups walk past the tombstone.
+        self.assertEqual(lp._linear_probe("ac", False), 8)
+        self.assertEqual(lp["ac"], 3)
+        self.assertNotIn("ab", lp)
+        self.assertEqual(len(lp), 2)
+        self.assertEqual(lp.tombstone_count, 1)
+
+        # Updating an existing key doesn't take the tombstone.
+        lp["ac"] = 4
+        self.assertEqual(lp._linear_probe("ac", False), 8)
+        # A new key does.
+        lp["ad"] = 5
+        self.assertEqual(lp._linear_probe("ad", False), 7)
+        self.assertEqual(lp.tombstone_count, 0)
+
+        del lp["aa"]
+        del lp["ad"]
+        self.assertEqual(lp.tombstone_count, 2)
+        # "ba" reuses a tombstone, "ca" doesn't.
+        lp["ba"] = 6
+        lp["ca"] = 7
+        self.assertEqual(lp.tombstone_count, 1)
+        del lp["ba"]
+        # Third tombstone passes 20% of 13 slots, so the table compacts.
+        del lp["ca"]
+        self.assertEqual(lp.tombstone_count, 0)
+        self.assertEqual(lp._linear_probe("ac", False), 6)
+        self.assertEqual(set(lp.keys()), {"ac"})
+        self.assertEqual(lp.values(), [4])
+
+    @number("8.4")
+    def test_tombstones_churn(self):
+        lp = LinearProbeTable(tombstones=True)
+        reference = {}
+        for i in range(2000):
+            key = f"k{i % 300}-{i % 7}"
+            if key in reference and i % 3:
+                del lp[key]
+                del reference[key]
+            else:
+                lp[key] = i
+                reference[key] = i
+        self.assertEqual(len(lp), len(reference))
+        self.assertEqual(set(lp.keys()), set(reference))
+        for key, value in reference.items():
+            self.assertEqual(lp[key], value)
+
+    @number("8.5")
+    def test_parallel_matches(self):
+        for tombstones in (False, True):
+            lp = LinearProbeTable(tombstones=tombstones)
+            pp = ParallelLinearProbeTable(tombstones=tombstones)
+            for i in range(1500):
+                key = f"k{i % 200}-{i % 11}"
+                if key in lp and i % 4 == 0:
+                    del lp[key]
+                    del pp[key]
+                else:
+                    lp[key] = i
+                    pp[key] = i
+            self.assertEqual(len(pp), len(lp))
+            self.assertEqual(pp.table_size, lp.table_size)
+            self.assertEqual(pp.keys(), lp.keys())
+            self.assertEqual(pp.values(), lp.values())
+            self.assertEqual(str(pp), str(lp))
+            for x in range(lp.table_size):
+                self.assertEqual(pp.array[x], lp.array[x])
+
+    @number("8.6")
+    def test_parallel_update_in_place(self):
+        pp = ParallelLinearProbeTable(sizes=[5, 13])
+        pp["Tim"] = 1
+        position = pp._linear_probe("Tim", False)
+        pp["Tim"] = 2
+        self.assertEqual(pp._linear_probe("Tim", False), position)
+        self.assertEqual(pp.value_array[position], 2)
+        self.assertEqual(pp.array[position], ("Tim", 2, pp.full_hash("Tim")))
+        self.assertEqual(len(pp), 1)
+        self.assertRaises(KeyError, lambda: pp["Jen"])
+
+    @number("8.7")
+    def test_bulk_load(self):
+        class AllocationCounter:
+            allocations = 0
+
+            def _allocate(self, table_size):
+                self.allocations += 1
+                super()._allocate(table_size)
+
+        pairs = [(f"mountain-{i}", i) for i in range(5000)]
+        for table_type in (LinearProbeTable, ParallelLinearProbeTable, RobinHoodTable):
+            counting = type("Counting" + table_type.__name__, (AllocationCounter, table_type), {})
+
+            # One allocation in the constructor, one for the final size.
+            table = counting.from_items(iter(pairs), expected_size=len(pairs))
+            self.assertEqual(table.allocations, 2)
+            self.assertEqual(len(table), len(pairs))
+            self.assertLessEqual(len(table), table.table_size * table.MAX_LOAD_FACTOR)
+            self.assertGreater(len(table), table.TABLE_SIZES[table.size_index - 1] * table.MAX_LOAD_FACTOR)
+
+            grown = counting()
+            for key, value in pairs:
+                grown[key] = value
+            self.assertEqual(grown.table_size, table.table_size)
+            self.assertGreater(grown.allocations, table.allocations)
+            for key, value in pairs:
+                self.assertEqual(table[key], value)
+
+            # Updating with a mix of old and new keys.
+            table.update_many((key, -value) for key, value in pairs[:10] + [("extra", 0)])
+            self.assertEqual(table[pairs[0][0]], 0)
+            self.assertEqual(table[pairs[9][0]], -9)
+            self.assertEqual(table["extra"], 0)
+            self.assertEqual(len(table), len(pairs) + 1)
+
+        # Keyword arguments go to the constructor.
+        small = LinearProbeTable.from_items([("a", 1), ("b", 2)], sizes=[3, 7])
+        self.assertEqual(small.table_size, 7)
+        self.assertEqual(small["b"], 2)
+
+    @number("8.8")
+    def test_hash_many(self):
+        keys = ["", "a", "Tim", "mount-everest-north", "mount-everest-south", "Ōmine-san", "🗻-fuji"]
+        keys += [f"mountain-{i}" * (i % 5 + 1) for i in range(300)]
+        for table_size in (5, 13, 1572869, LinearProbeTable.FULL_HASH_MODULUS):
+            expected = [polynomial_hash(key, table_size) for key in keys]
+            self.assertEqual(hash_many(keys, table_size), expected)
+            with patch.object(string_hash, "np", None):
+                self.assertEqual(hash_many(keys, table_size), expected)
+
+        # Same slots as the scalar hashes of both tables.
+        lp = LinearProbeTable.from_items((key, i) for i, key in enumerate(keys))
+        full_hashes = hash_many(keys, lp.FULL_HASH_MODULUS)
+        self.assertEqual([h % lp.table_size for h in full_hashes], [lp.hash(key) for key in keys])
+        dt = DoubleKeyTable()
+        self.assertEqual([h % dt.table_size for h in full_hashes], [dt.hash1(key) for key in keys])
+        self.assertEqual([h % lp.table_size for h in full_hashes], [dt.hash2(key, lp) for key in keys])
+
+        self.assertEqual(lp.get_many(keys[::-1]), list(range(len(keys)))[::-1])
+        self.assertRaises(KeyError, lambda: lp.get_many(["Tim", "Jen"]))
+        pp = ParallelLinearProbeTable.from_items((key, i) for i, key in enumerate(keys))
+        self.assertEqual(pp.get_many(keys), list(range(len(keys))))
+
+    @number("8.9")
+    def test_shrink(self):
+        for table_type in (LinearProbeTable, ParallelLinearProbeTable, RobinHoodTable):
+            table = table_type.from_items(((f"peak-{i}", i) for i in range(3000)), min_load_factor=0.1)
+            full_size = table.table_size
+            for i in range(2990):
+                del table[f"peak-{i}"]
+            # Down to the smallest size at most half of MAX_LOAD_FACTOR full.
+            self.assertLess(table.table_size, full_size)
+            self.assertLessEqual(len(table), table.table_size * table.MAX_LOAD_FACTOR / 2)
+            self.assertEqual(table.table_size, table.TABLE_SIZES[table.size_index])
+            self.assertEqual(set(table.keys()), {f"peak-{i}" for i in range(2990, 3000)})
+            for i in range(2990, 3000):
+                self.assertEqual(table[f"peak-{i}"], i)
+
+        # No resizing back and forth at the threshold.
+        lp = LinearProbeTable(min_load_factor=0.1)
+        lp.update_many((f"k{i}", i) for i in range(11))
+        self.assertEqual(lp.table_size, 29)
+        del lp["k0"]
+        del lp["k1"]
+        self.assertEqual(lp.table_size, 29)
+        # Only under 0.1 * 29 entries does it shrink, to 13 where 2 entries
+        # are well under the 0.5 * 13 that would make it grow again.
+        for i in range(2, 9):
+            del lp[f"k{i}"]
+        self.assertEqual(lp.table_size, 13)
+        lp["k0"] = 0
+        lp["k1"] = 1
+        del lp["k0"]
+        self.assertEqual(lp.table_size, 13)
+        self.assertEqual(LinearProbeTable().MIN_LOAD_FACTOR, None)
+
+    @number("8.10")
+    def test_shrink_with_tombstones(self):
+        lp = LinearProbeTable(tombstones=True, min_load_factor=0.1)
+        lp.update_many((f"k{i}", i) for i in range(1000))
+        for i in range(995):
+            del lp[f"k{i}"]
+        self.assertEqual(lp.tombstone_count, 0)
+        self.assertEqual(lp.table_size, 29)
+        self.assertEqual(sorted(lp.values()), [995, 996, 997, 998, 999])
+
+    @number("8.11")
+    def test_stats(self):
+        lp = LinearProbeTable(sizes=[7])
+        # 'a' and 'h' both have home 6.
+        lp.hash = lambda k: ord(k[0]) % 7
+        lp.enable_stats()
+        lp["aa"] = 1
+        lp["ab"] = 2
+        lp["ha"] = 3
+        self.assertEqual(lp["ab"], 2)
+        self.assertEqual(lp["ha"], 3)
+        self.assertNotIn("az", lp)
+
+        stats = lp.stats()
+        # Inserts of new keys end at an empty slot, as do failed lookups.
+        self.assertEqual(stats["hits"], [0, 0, 1, 1])
+        self.assertEqual(stats["misses"], [0, 1, 1, 1, 1])
+        # Slots 6, 0 and 1, wrapping around the end.
+        self.assertEqual(stats["max_cluster"], 3)
+        self.assertEqual(stats["load_factor"], 3 / 7)
+        self.assertEqual(stats["rehashes"], 0)
+
+        for table_type in (LinearProbeTable, ParallelLinearProbeTable, RobinHoodTable):
+            table = table_type()
+            table.enable_stats()
+            for i in range(1000):
+                table[f"k{i}"] = i
+            for i in range(1000):
+                self.assertEqual(table[f"k{i}"], i)
+            stats = table.stats()
+            self.assertEqual(sum(stats["hits"]), 1000)
+            self.assertEqual(sum(stats["misses"]), 1000)
+            self.assertEqual(stats["rehashes"], table.size_index)
+            self.assertGreaterEqual(stats["rehash_time"], 0)
+            self.assertEqual(json.loads(table.stats_json()), stats)
+
+            table.disable_stats()
+            table["k0"] = 1
+            self.assertEqual(table.stats()["hits"], [0])
+            self.assertEqual(table.stats()["count"], 1000)
+
+    @number("8.12")
+    def test_hash_strategies(self):
+        keys = [f"mountain-{i}" for i in range(500)]
+        self.assertEqual(PolynomialHash().hash_many(keys), hash_many(keys, LinearProbeTable.FULL_HASH_MODULUS))
+        # FNV-1a test vectors, with the top bit dropped.
+        self.assertEqual(FNV1aHash().full_hash(""), 0xcbf29ce484222325 & (FULL_HASH_LIMIT - 1))
+        self.assertEqual(FNV1aHash().full_hash("a"), 0xaf63dc4c8601ec8c & (FULL_HASH_LIMIT - 1))
+        self.assertEqual(BuiltinHash().full_hash(12), 12)
+        self.assertTrue(0 <= BuiltinHash().full_hash(-1) < FULL_HASH_LIMIT)
+
+        for strategy in (PolynomialHash(), BuiltinHash(), FNV1aHash()):
+            for table_type in (LinearProbeTable, ParallelLinearProbeTable, RobinHoodTable):
+                table = table_type(hash_strategy=strategy)
+                self.assertIs(table.HASH_STRATEGY, strategy)
+                for i, key in enumerate(keys):
+                    table[key] = i
+                self.assertEqual(table.get_many(keys), list(range(len(keys))))
+                self.assertEqual([table.hash(key) for key in keys],
+                                 [h % table.table_size for h in strategy.hash_many(keys)])
+
+            # Both keys of a DoubleKeyTable, and its internal tables, share the strategy.
+            dt = DoubleKeyTable(hash_strategy=strategy)
+            for i, key in enumerate(keys):
+                dt[key[-1], key] = i
+            self.assertEqual(dt["7", "mountain-17"], 17)
+            for key1 in dt.iter_keys():
+                position = dt._outer_probe(key1, False)
+                self.assertIs(dt.array[position][1].HASH_STRATEGY, strategy)
+                self.assertNotIn("hash", vars(dt.array[position][1]))
+        # Integer keys land at k % table_size.
+        dt = DoubleKeyTable(hash_strategy=BuiltinHash())
+        dt[5, "a"] = 1
+        self.assertEqual(dt.array[5 % dt.table_size][0], 5)
+
+    @number("8.13")
+    def test_memory_footprint(self):
+        for table_type in (LinearProbeTable, ParallelLinearProbeTable, RobinHoodTable):
+            table = table_type()
+            empty = table.memory_footprint()
+            self.assertEqual(empty["keys"] + empty["values"] + empty["entries"], 0)
+            self.assertGreater(empty["slots"], 0)
+
+            shared = ["shared"]
+            for i in range(100):
+                table[f"k{i}"] = shared
+            footprint = table.memory_footprint()
+            self.assertEqual(footprint["total"], sum(v for k, v in footprint.items() if k != "total"))
+            self.assertEqual(footprint["nested"], 0)
+            self.assertEqual(footprint["values"], sys.getsizeof(shared) + sys.getsizeof("shared"))
+            self.assertEqual(footprint["keys"], sum(sys.getsizeof(f"k{i}") for i in range(100)))
+            # Only tuple slots allocate entries.
+            self.assertEqual(footprint["entries"] > 0, table_type is not ParallelLinearProbeTable)
+
+            # Objects already seen are left out, along with what they hold.
+            seen = {id(shared)}
+            self.assertEqual(table.memory_footprint(seen)["values"], 0)
+            self.assertEqual(table.memory_footprint(seen)["total"], 0)
+
+    @number("8.14")
+    def test_compact_at_smallest_size(self):
+        lp = LinearProbeTable(tombstones=True, min_load_factor=0.1)
+        for i in range(50):
+            lp[f"k{i}"] = i
+            del lp[f"k{i}"]
+        # Shrinking has nothing to do at the smallest size, so compaction must.
+        self.assertEqual(lp.table_size, lp.TABLE_SIZES[0])
+        self.assertLessEqual(lp.tombstone_count, lp.table_size * lp.TOMBSTONE_LIMIT)
+        self.assertNotIn("k0", lp)
+
+    @number("8.15")
+    def test_int_keys_with_overridden_hash(self):
+        for table_type in (LinearProbeTable, RobinHoodTable, ParallelLinearProbeTable, CompactLinearProbeTable):
+            lp = table_type()
+            lp.hash = lambda k: k % lp.table_size
+            lp[5] = 1
+            for i in range(50):
+                lp[i] = i
+            lp.update_many((i, -i) for i in range(40, 60))
+            self.assertEqual([lp[i] for i in range(60)], list(range(40)) + [-i for i in range(40, 60)])
+            del lp[5]
+            self.assertNotIn(5, lp)
+        # Without an overridden hash, ints are still rejected.
+        self.assertRaises(TypeError, lambda: LinearProbeTable().__setitem__(5, 1))
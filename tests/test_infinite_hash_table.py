@@ -1,6 +1,8 @@
+import sys
 import unittest
 from ed_utils.decorators import number
 
+from data_structures.referential_array import SparseArrayR
 from infinite_hash_table import InfiniteHashTable
 
 class TestInfiniteHash(unittest.TestCase):
@@ -91,3 +93,122 @@ class TestInfiniteHash(unittest.TestCase):
             "mining"
         ]
         self.assertListEqual(res, expected)
+
+    @number("4.4")
+    def test_long_shared_prefix(self):
+        # Much deeper than the recursion limit.
+        prefix = "mount-everest" * 400
+        ih = InfiniteHashTable()
+        ih[prefix + "-north"] = 1
+        ih[prefix + "-south"] = 2
+        ih[prefix] = 3
+        ih["k2"] = 4
+        self.assertEqual(len(ih), 4)
+        self.assertEqual(ih[prefix + "-south"], 2)
+        self.assertEqual(len(ih.get_location(prefix + "-north")), len(prefix) + 2)
+        self.assertEqual(ih.get_location(prefix)[-1], 26)
+        self.assertNotIn(prefix + "-east", ih)
+        self.assertRaises(KeyError, lambda: ih[prefix[:-1]])
+        self.assertEqual(ih.sort_keys(), ["k2", prefix, prefix + "-north", prefix + "-south"])
+
+        ih[prefix] = 5
+        self.assertEqual((len(ih), ih[prefix]), (4, 5))
+        del ih[prefix + "-south"]
+        del ih[prefix]
+        self.assertRaises(KeyError, lambda: ih.__delitem__(prefix))
+        self.assertEqual(ih.get_location(prefix + "-north"), [ih.hash(prefix)])
+        self.assertEqual(len(ih), 2)
+
+    @number("4.5")
+    def test_memory_footprint(self):
+        ih = InfiniteHashTable()
+        ih["lin"] = [1]
+        ih["leg"] = [2]
+        ih["mine"] = [3]
+        footprint = ih.memory_footprint()
+        self.assertEqual(footprint["total"], sum(v for k, v in footprint.items() if k != "total"))
+        # "l" labels the table holding "lin" and "leg".
+        self.assertEqual(footprint["keys"], sum(sys.getsizeof(key) for key in ["l", "lin", "leg", "mine"]))
+        self.assertEqual(footprint["values"], sum(sys.getsizeof([i]) + sys.getsizeof(i) for i in (1, 2, 3)))
+        self.assertEqual(footprint["nested"], InfiniteHashTable().memory_footprint()["total"] + 2 * sys.getsizeof(("lin", 1)))
+
+        sparse = InfiniteHashTable(sparse_levels=True)
+        for key in ["lin", "leg", "mine"]:
+            sparse[key] = [1]
+        nested = sparse.array[sparse.hash("lin")][1]
+        self.assertEqual(sparse.memory_footprint()["nested"], sys.getsizeof(nested) + sys.getsizeof(vars(nested))
+                         + sum(map(sys.getsizeof, (nested.array, nested.array.bitmap, nested.array.children)))
+                         + 2 * sys.getsizeof(("lin", 1)))
+        self.assertLess(sparse.memory_footprint()["nested"], footprint["nested"])
+
+        # Lower levels of lower levels are sparse too, at the same positions.
+        sparse["linked"] = ih["linked"] = 4
+        self.assertEqual(sparse.get_location("linked"), ih.get_location("linked"))
+        self.assertIsInstance(nested.array[nested.hash("lin")][1].array, SparseArrayR)
+
+    @number("4.6")
+    def test_sorted_queries(self):
+        ih = InfiniteHashTable()
+        for i, key in enumerate(["lin", "leg", "mine", "linked", "limp", "mining", "jake", "linger"]):
+            ih[key] = i
+        keys = ih.iter_sorted_keys()
+        self.assertEqual((next(keys), next(keys)), ("jake", "leg"))
+        self.assertEqual(list(keys), ["limp", "lin", "linger", "linked", "mine", "mining"])
+        self.assertEqual(list(ih.keys_with_prefix("lin")), ["lin", "linger", "linked"])
+        self.assertEqual(list(ih.keys_with_prefix("ling")), ["linger"])
+        self.assertEqual(list(ih.keys_with_prefix("k")), [])
+        self.assertEqual(list(ih.keys_with_prefix("")), ih.sort_keys())
+        self.assertEqual(list(ih.keys_in_range("leg", "linh")), ["leg", "limp", "lin", "linger"])
+        self.assertEqual(list(ih.keys_in_range("lio", "mine")), [])
+        self.assertEqual(list(ih.keys_in_range("a", "z")), ih.sort_keys())
+
+    @number("4.7")
+    def test_rank_select(self):
+        ih = InfiniteHashTable()
+        for i, key in enumerate(["lin", "leg", "mine", "linked", "limp", "mining", "jake", "linger"]):
+            ih[key] = i
+        del ih["limp"]
+        keys = ih.sort_keys()
+        self.assertEqual([ih.rank(key) for key in keys], list(range(len(keys))))
+        self.assertEqual([ih.select(i) for i in range(len(keys))], keys)
+        self.assertRaises(KeyError, lambda: ih.rank("limp"))
+        self.assertRaises(KeyError, lambda: ih.rank("li"))
+        self.assertRaises(IndexError, lambda: ih.select(len(keys)))
+
+    @number("4.8")
+    def test_indistinguishable_keys(self):
+        ih = InfiniteHashTable()
+        ih["m0"] = 1
+        # '0' and 'd' are both 22 mod 26.
+        self.assertRaises(ValueError, lambda: ih.__setitem__("md", 2))
+        self.assertEqual((len(ih), ih["m0"], ih.get_location("m0")), (1, 1, [ih.hash("m0")]))
+        ih["mount"] = 3
+        ih["Ga"] = 4
+        self.assertRaises(ValueError, lambda: ih.__setitem__("aa", 5))
+        self.assertEqual(ih.sort_keys(), ["Ga", "m0", "mount"])
+
+    @number("4.9")
+    def test_sorted_queries_with_collisions(self):
+        # '-' and 'a' share a slot, as do '0' and 'd'.
+        ih = InfiniteHashTable()
+        for i, key in enumerate(["ma", "m-x", "mb", "mount-b", "mounta", "mount-0", "mountd", "m0"]):
+            ih[key] = i
+        expected = sorted(["ma", "m-x", "mb", "mount-b", "mounta", "mount-0", "mountd", "m0"])
+        self.assertEqual(ih.sort_keys(), expected)
+        self.assertEqual(list(ih.keys_in_range("m-", "m.")), ["m-x"])
+        self.assertEqual(list(ih.keys_in_range("m", "ma")), ["m-x", "m0"])
+        self.assertEqual(list(ih.keys_with_prefix("mount-")), ["mount-0", "mount-b"])
+        self.assertEqual(list(ih.keys_with_prefix("mounta")), ["mounta"])
+        del ih["m-x"]
+        self.assertEqual(list(ih.keys_in_range("m-", "mb")), ["m0", "ma"])
+
+    @number("4.10")
+    def test_rank_select_with_collisions(self):
+        ih = InfiniteHashTable()
+        # '-' and 'a' share a slot, as do '0' and 'd'.
+        for i, key in enumerate(["ma", "m-x", "m0", "mount-b", "mounta", "mount-0", "mountd", "mad"]):
+            ih[key] = i
+        keys = ih.sort_keys()
+        self.assertEqual(keys[:3], ["m-x", "m0", "ma"])
+        self.assertEqual([ih.rank(key) for key in keys], list(range(len(keys))))
+        self.assertEqual([ih.select(i) for i in range(len(keys))], keys)
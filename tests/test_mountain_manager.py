@@ -56,3 +56,25 @@ class TestInfiniteHash(unittest.TestCase):
         self.assertEqual(len(res), 4)
 
         self.assertEqual(make_set(res[3]), make_set([m10]))
+
+    @number("5.2")
+    def test_find_and_edit(self):
+        m1 = Mountain("m1", 2, 2)
+        m2 = Mountain("m2", 3, 9)
+        mm = MountainManager()
+        mm.add_mountain(m1)
+        mm.add_mountain(m2)
+        self.assertIs(mm.find_mountain("m2"), m2)
+        self.assertRaises(KeyError, lambda: mm.find_mountain("m3"))
+
+        mm.edit_mountain(m1, Mountain("m1", 5, 2))
+        self.assertEqual(mm.find_mountain("m1").difficulty_level, 5)
+        self.assertNotIn(("2", "m1"), mm.mountains)
+
+        # As the GUI does, editing the stored mountain in place.
+        old = Mountain(m2.name, m2.difficulty_level, m2.length)
+        m2.name, m2.difficulty_level = "m3", 4
+        mm.edit_mountain(old, m2)
+        self.assertIs(mm.find_mountain("m3"), m2)
+        self.assertRaises(KeyError, lambda: mm.find_mountain("m2"))
+        self.assertIn(("4", "m3"), mm.mountains)
@@ -0,0 +1,143 @@
+import random
+import unittest
+from ed_utils.decorators import number
+
+from infinite_hash_table import InfiniteHashTable
+from radix_infinite_hash_table import RadixInfiniteHashTable
+
+
+class TestRadixInfiniteHashTable(unittest.TestCase):
+
+    def count_tables(self, ih: InfiniteHashTable) -> int:
+        res = 0
+        tables = [ih]
+        while tables:
+            table = tables.pop()
+            res += 1
+            tables.extend(entry[1] for entry in table.array
+                          if entry is not None and isinstance(entry[1], InfiniteHashTable))
+        return res
+
+    @number("14.1")
+    def test_example(self):
+        rt = RadixInfiniteHashTable()
+        rt["lin"] = 1
+        rt["leg"] = 2
+        self.assertEqual(rt.get_location("lin"), [4, 1])
+        self.assertEqual(rt.get_location("leg"), [4, 23])
+        rt["mine"] = 3
+        rt["linked"] = 4
+        # "lin" and "linked" go straight to a table at level 3.
+        self.assertEqual(rt.get_location("lin"), [4, 1, 26])
+        self.assertEqual(rt.get_location("linked"), [4, 1, 3])
+        rt["limp"] = 5
+        # Splits the "lin" edge at level 2.
+        self.assertEqual(rt.get_location("limp"), [4, 1, 5])
+        self.assertEqual(rt.get_location("linked"), [4, 1, 6, 3])
+        rt["mining"] = 6
+        self.assertEqual(rt.get_location("mine"), [5, 23])
+        self.assertEqual(rt.get_location("mining"), [5, 1])
+        self.assertEqual(len(rt), 6)
+        self.assertEqual(rt.sort_keys(), ["leg", "limp", "lin", "linked", "mine", "mining"])
+
+        del rt["limp"]
+        self.assertEqual(rt.get_location("linked"), [4, 1, 3])
+        del rt["mine"]
+        self.assertEqual(rt.get_location("mining"), [5])
+        self.assertRaises(KeyError, lambda: rt["mine"])
+        self.assertEqual(len(rt), 4)
+
+    @number("14.2")
+    def test_shared_prefix(self):
+        names = ["mount-everest-north", "mount-everest-south"]
+        ih = InfiniteHashTable()
+        rt = RadixInfiniteHashTable()
+        for i, name in enumerate(names):
+            ih[name] = i
+            rt[name] = i
+        self.assertEqual(self.count_tables(ih), 15)
+        self.assertEqual(self.count_tables(rt), 2)
+        self.assertEqual(rt.get_location(names[0]), [ih.get_location(names[0])[0], ih.get_location(names[0])[-1]])
+        self.assertLess(rt.memory_footprint()["total"], ih.memory_footprint()["total"])
+        self.assertRaises(ValueError, lambda: rt.__setitem__("Ga", 1) or rt.__setitem__("aa", 2))
+
+    @number("14.3")
+    def test_matches_infinite_hash_table(self):
+        rng = random.Random(0)
+        words = [''.join(rng.choice("abcdefghijz") for _ in range(rng.randint(1, 12))) for _ in range(2000)]
+        ih = InfiniteHashTable()
+        rt = RadixInfiniteHashTable()
+        for i, word in enumerate(words):
+            ih[word] = i
+            rt[word] = i
+        for word in list(dict.fromkeys(words))[::3]:
+            del ih[word]
+            del rt[word]
+        self.assertEqual(len(rt), len(ih))
+        self.assertEqual(rt.sort_keys(), ih.sort_keys())
+        self.assertLessEqual(self.count_tables(rt), self.count_tables(ih))
+        for word in set(words):
+            self.assertEqual(word in rt, word in ih)
+            if word in ih:
+                self.assertEqual(rt[word], ih[word])
+                # The same positions, less the levels with a single entry.
+                self.assertTrue(set(rt.get_location(word)) <= set(ih.get_location(word)))
+
+    @number("14.4")
+    def test_sorted_queries(self):
+        rt = RadixInfiniteHashTable()
+        for i, key in enumerate(["mount-everest-north", "mount-everest-south", "mount-cook", "k2", "mount"]):
+            rt[key] = i
+        self.assertEqual(list(rt.iter_sorted_keys()), rt.sort_keys())
+        self.assertEqual(list(rt.keys_with_prefix("mount-e")), ["mount-everest-north", "mount-everest-south"])
+        self.assertEqual(list(rt.keys_with_prefix("mount-everest-s")), ["mount-everest-south"])
+        self.assertEqual(list(rt.keys_with_prefix("mount-x")), [])
+        self.assertEqual(list(rt.keys_in_range("mount-d", "mount-everest-p")), ["mount-everest-north"])
+
+    @number("14.5")
+    def test_rank_select(self):
+        rng = random.Random(1)
+        rt = RadixInfiniteHashTable()
+        for i in range(500):
+            rt[''.join(rng.choice("abcdefghijz") for _ in range(rng.randint(1, 8)))] = i
+        keys = rt.sort_keys()
+        self.assertEqual([rt.rank(key) for key in keys], list(range(len(keys))))
+        self.assertEqual([rt.select(i) for i in range(len(keys))], keys)
+
+    @number("14.6")
+    def test_sorted_queries_with_collisions(self):
+        rng = random.Random(2)
+        # '-' and 'a' share a slot, as do '0' and 'd'.
+        alphabet = "ad-0m"
+        rt = RadixInfiniteHashTable(sparse_levels=True)
+        keys = set()
+        for i in range(400):
+            key = ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 7)))
+            try:
+                rt[key] = i
+            except ValueError:
+                # Hashes alike at every level with a key already in.
+                continue
+            keys.add(key)
+        for key in sorted(keys)[::4]:
+            del rt[key]
+            keys.discard(key)
+        expected = sorted(keys)
+        self.assertEqual(rt.sort_keys(), expected)
+        for lo, hi in [("m-", "m."), ("a", "d"), ("-", "0a"), ("ma0", "mad")]:
+            self.assertEqual(list(rt.keys_in_range(lo, hi)), [key for key in expected if lo <= key < hi])
+        for prefix in ["m-", "ma", "-0", "d"]:
+            self.assertEqual(list(rt.keys_with_prefix(prefix)), [key for key in expected if key.startswith(prefix)])
+
+    @number("14.7")
+    def test_rank_select_with_collisions(self):
+        rng = random.Random(3)
+        rt = RadixInfiniteHashTable()
+        for i in range(400):
+            try:
+                rt[''.join(rng.choice("ad-0m") for _ in range(rng.randint(1, 7)))] = i
+            except ValueError:
+                continue
+        keys = rt.sort_keys()
+        self.assertEqual([rt.rank(key) for key in keys], list(range(len(keys))))
+        self.assertEqual([rt.select(i) for i in range(len(keys))], keys)
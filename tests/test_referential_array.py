@@ -0,0 +1,59 @@
+import unittest
+from ed_utils.decorators import number
+
+from data_structures.referential_array import ArrayR, ArrayN, SparseArrayR
+
+
+class TestReferentialArray(unittest.TestCase):
+
+    @number("11.1")
+    def test_array_r_bulk(self):
+        a = ArrayR(4)
+        self.assertEqual([a[i] for i in range(4)], [None] * 4)
+        a[0], a[1], a[3] = "Everest", 8849, ("K2", 8611)
+
+        bigger = a.resize(6)
+        self.assertEqual([bigger[i] for i in range(6)], ["Everest", 8849, None, ("K2", 8611), None, None])
+        # References are shared, not copied.
+        self.assertIs(bigger[3], a[3])
+        smaller = a.resize(2)
+        self.assertEqual(len(smaller), 2)
+        self.assertEqual([smaller[i] for i in range(2)], ["Everest", 8849])
+
+        b = ArrayR(5)
+        b.copy_from(a, 2, start=3)
+        self.assertEqual([b[i] for i in range(5)], [None, None, None, "Everest", 8849])
+        self.assertRaises(IndexError, lambda: b.copy_from(a, 3, start=3))
+        self.assertRaises(ValueError, lambda: ArrayR(0))
+
+    @number("11.2")
+    def test_array_n(self):
+        a = ArrayN(3)
+        self.assertEqual([a[i] for i in range(3)], [0, 0, 0])
+        a[1] = 2 ** 40
+        self.assertEqual(a[1], 2 ** 40)
+
+        b = ArrayN(3, 'i', -2)
+        self.assertEqual([b[i] for i in range(3)], [-2, -2, -2])
+        self.assertRaises(OverflowError, lambda: b.__setitem__(0, 2 ** 40))
+        b[0] = 7
+        c = b.resize(5, fill=-1)
+        self.assertEqual([c[i] for i in range(5)], [7, -2, -2, -1, -1])
+        c.copy_from(b, 1, start=4)
+        self.assertEqual(c[4], 7)
+        self.assertRaises(IndexError, lambda: c[5])
+
+    @number("11.3")
+    def test_sparse_array_r(self):
+        a = SparseArrayR(27)
+        self.assertEqual((len(a), list(a)), (27, [None] * 27))
+        a[26], a[3], a[10] = "z", "d", "k"
+        self.assertEqual((a[3], a[10], a[26], a[4]), ("d", "k", "z", None))
+        self.assertEqual(a.children, ["d", "k", "z"])
+        a[10] = "K"
+        a[3] = None
+        self.assertEqual(a.children, ["K", "z"])
+        self.assertEqual([i for i, item in enumerate(a) if item is not None], [10, 26])
+        self.assertRaises(IndexError, lambda: a[27])
+        self.assertRaises(IndexError, lambda: a.__setitem__(-1, "x"))
+        self.assertRaises(ValueError, lambda: SparseArrayR(0))
@@ -0,0 +1,83 @@
+import unittest
+from ed_utils.decorators import number
+
+from data_structures.robin_hood_table import RobinHoodTable
+from data_structures.hash_table import LinearProbeTable
+
+
+class TestRobinHoodTable(unittest.TestCase):
+
+    def assert_invariant(self, rh: RobinHoodTable) -> None:
+        """Every entry's recorded distance is its distance from home."""
+        for position in range(rh.table_size):
+            item = rh.array[position]
+            if item is not None:
+                home = rh.hash(item[0])
+                self.assertEqual(rh.distances[position], (position - home) % rh.table_size)
+
+    @number("9.1")
+    def test_example(self):
+        rh = RobinHoodTable(sizes=[7])
+        # 'a' and 'h' have home 6, 'b' has home 0.
+        rh.hash = lambda k: ord(k[0]) % 7
+
+        rh["aa"] = 1
+        rh["ab"] = 2
+        rh["ha"] = 3
+        rh["ba"] = 4
+        self.assertEqual(rh._linear_probe("aa", False), 6)
+        self.assertEqual(rh._linear_probe("ab", False), 0)
+        self.assertEqual(rh._linear_probe("ha", False), 1)
+        self.assertEqual(rh._linear_probe("ba", False), 2)
+        self.assertEqual([rh.distances[i] for i in (6, 0, 1, 2)], [0, 1, 2, 2])
+
+        # A failed lookup stops at "ba", which is closer to its home than
+        # "az" would be, before ever reaching the empty slot 3.
+        self.assertEqual(rh._search("az", rh.full_hash("az")), (2, 3, False))
+        self.assertRaises(KeyError, lambda: rh._linear_probe("az", False))
+
+        # So an insert of "ac" takes that slot and pushes "ba" on.
+        rh["ac"] = 5
+        self.assertEqual(rh._linear_probe("ac", False), 2)
+        self.assertEqual(rh._linear_probe("ba", False), 3)
+        self.assert_invariant(rh)
+
+        del rh["aa"]
+        # The rest of the cluster shifts back a slot.
+        self.assertEqual(rh._linear_probe("ab", False), 6)
+        self.assertEqual(rh._linear_probe("ha", False), 0)
+        self.assertEqual(rh._linear_probe("ac", False), 1)
+        self.assertEqual(rh._linear_probe("ba", False), 2)
+        self.assertIsNone(rh.array[3])
+        self.assertEqual(len(rh), 4)
+        self.assert_invariant(rh)
+
+    @number("9.2")
+    def test_matches_dict(self):
+        rh = RobinHoodTable()
+        reference = {}
+        for i in range(3000):
+            key = f"mount-{i % 400}-{i % 13}"
+            if key in reference and i % 3 == 0:
+                del rh[key]
+                del reference[key]
+            else:
+                rh[key] = i
+                reference[key] = i
+        self.assertEqual(len(rh), len(reference))
+        self.assertEqual(set(rh.keys()), set(reference))
+        for key, value in reference.items():
+            self.assertEqual(rh[key], value)
+        self.assertNotIn("mount-missing", rh)
+        self.assert_invariant(rh)
+
+    @number("9.3")
+    def test_load_factor(self):
+        rh = RobinHoodTable()
+        lp = LinearProbeTable()
+        for i in range(1000):
+            rh[f"k{i}"] = i
+            lp[f"k{i}"] = i
+        self.assertLessEqual(len(rh), rh.table_size * rh.MAX_LOAD_FACTOR)
+        self.assertLess(rh.table_size, lp.table_size)
+        self.assert_invariant(rh)